@@ -1,26 +1,112 @@
 import sys
 import re
-from os import environ, path
-from time import sleep
+import argparse
+import gc
+import json
+import mmap
+import struct
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from collections.abc import Sequence
 from datetime import datetime
-from random import shuffle
+from functools import lru_cache
+from io import BytesIO
+from math import isnan, nan
+from os import environ, listdir, makedirs, path, remove, replace, walk
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import sleep, strftime, perf_counter, process_time
+from random import Random, getrandbits, randrange, shuffle
+from statistics import fmean, median, pstdev
+
+# start of the startup profile, pyphen, pygame.freetype and pyperclip are imported when first needed, as are the
+# modules of the history, the compilation, the operator screen, the clipboard helpers and the soak
+STARTED_AT = perf_counter()
 
-import pyphen
 import pygame as pg
-import pygame.freetype
-from external import pyperclip
 
 # Parameters
 ASSETS_PATH = "assets"
 WORD_DURATION = 0.5
 WORD_DURATION_PER_CAR = 0.1
+FRAME_RATE = 60
+WORD_CACHE_SIZE = 64
+WORD_LOOKAHEAD = 3
+WORD_COLORS = ("lightgrey", "steelblue3")
+# letters (one render per letter), atlas (cached glyphs) or runs (one render per syllable)
+WORD_RENDERING = "runs"
+# surface: software blits on the display surface, texture: SDL2 renderer (pygame._sdl2.video)
+RENDERER = "surface"
+RENDERER_VSYNC = True
+FONT_CACHE_SIZE = 32
+STAR_SIZE = (30, 30)
+SYLLABLE_CACHE_VERSION = 1
+WORD_BATCH_SIZE = 256
+WORD_QUEUE_SIZE = 4
+CLIPBOARD_TIMEOUT = 3
+AUDIO_FREQUENCY = 44100
+AUDIO_BUFFER = 512
+CORPUS_VERSION = 1
+CORPUS_MAGIC = b"LDRC"
+# magic, version, reserved, words, positions, blob size, source crc32, source size, pyphen version, locale
+CORPUS_HEADER = struct.Struct("<4sHHIIIIQ16s16s")
+CORPUS_CHUNK_SIZE = 2000
+WORD_INDEX_VERSION = 1
+WORD_INDEX_MAGIC = b"LDRI"
+# magic, version, longest n-gram, words, syllable offsets, n-grams, postings, n-gram blob size, corpora crc, locale
+WORD_INDEX_HEADER = struct.Struct("<4sHHIIIIII16s")
+WORD_INDEX_NGRAM = 3
+SELECTION_WORDS = 20
+ASSET_PACK = "ledora.ldp"
+ASSET_PACK_VERSION = 1
+ASSET_PACK_MAGIC = b"LDRP"
+# magic, version, reserved, members, size of the names
+ASSET_PACK_HEADER = struct.Struct("<4sHHII")
+# offset, size, name size
+ASSET_PACK_ENTRY = struct.Struct("<QQI")
+ASSET_PACK_DIRS = (ASSETS_PATH, "txts")
+ASSET_PACK_ALIGN = 16
+SESSION_LOG_VERSION = 1
+HISTORY_MONTHS = 4
+HISTORY_HARDEST_WORDS = 3
+PROFILE_WINDOW = 240
+PROFILE_TOP = 5
+PROFILE_REFRESH = 0.25
+# upper bounds of the bins of the frame time histogram, in ms
+PROFILE_BINS = (1, 2, 4, 8, 16, 33, 66)
+PROFILE_KEY = pg.K_F3
+PROFILE_EXPORT_KEY = pg.K_F4
+# operator <-> display process messages: a type byte followed by the struct of the type
+DISPLAY_HELLO = 1  # display -> operator: screen size
+DISPLAY_PRELOAD = 2  # operator -> display: slot, size and RGBA pixels of a pre-rendered word
+DISPLAY_FRAME = 3  # operator -> display: slot of the word, gray, progress, progress color, time of the key
+DISPLAY_FLIPPED = 4  # display -> operator: time of the key, time of the flip
+DISPLAY_QUIT = 5
+DISPLAY_HELLO_BODY = struct.Struct("<HH")
+DISPLAY_PRELOAD_BODY = struct.Struct("<IHH")
+DISPLAY_FRAME_BODY = struct.Struct("<I?fBd")
+DISPLAY_FLIPPED_BODY = struct.Struct("<dd")
+DISPLAY_NO_SLOT = 0xFFFFFFFF
+# key to flip on the child screen, within one frame
+DISPLAY_LATENCY_BUDGET = 1 / FRAME_RATE
+# soak runs: sampled every SOAK_INTERVAL cycles, the growth is measured after SOAK_WARMUP cycles
+SOAK_INTERVAL = 10
+SOAK_WARMUP = 20
+SOAK_WORDS = 20
+# maximum growth per cycle: bytes of the Python heap, then counts
+SOAK_THRESHOLDS = {"heap": 2048, "objects": 5, "surfaces": 0.05, "fonts": 0.01, "files": 0.01}
 APP_NAME = "Ledora"
 APP_VERSION = "1.0.5"
 FONT_COLOR = (250, 240, 230)
 FONT_COLOR_A = "steelblue3"
 FONT_COLOR_B = "white"
+# progress over all the words, over the words loaded so far
+PROGRESS_COLORS = (FONT_COLOR_A, WORD_COLORS[0])
 LOGO_IMG = "logo.png"
 BACKGROUND_IMG = "background.png"
+MENU_FONT = "font.ttf"
+WORD_FONT = "OpenDyslexic-Regular.otf"
 BUTTON_IMG = "button.png"
 STAR_IMG = "star.png"
 POSITIVE_SOUND = "click-button-140881.mp3"
@@ -32,6 +118,37 @@ MAIN_SOUND = "happy-logoversion-3-13398.mp3"
 
 environ["SDL_VIDEO_CENTERED"] = "1"
 
+# short effects are decoded in memory, the long tracks are streamed by pygame.mixer.music
+EFFECT_SOUNDS = {
+    "positive": POSITIVE_SOUND,
+    "negative": NEGATIVE_SOUND,
+    "pause": PAUSE_SOUND,
+    "countdown": COUNTDOWN_SOUND,
+}
+MUSIC_TRACKS = {
+    "main": MAIN_SOUND,
+    "results": RESULTS_SOUND,
+}
+
+# pyperclip backends whose paste runs a helper process, read directly with a timeout
+CLIPBOARD_COMMANDS = {
+    "pbcopy": ["pbpaste", "r"],
+    "xclip": ["xclip", "-selection", "c", "-o"],
+    "xsel": ["xsel", "-b", "-o"],
+    "wl-clipboard": ["wl-paste", "-n"],
+}
+CLIPBOARD_BACKENDS = {
+    "paste_osx_pbcopy": "pbcopy",
+    "paste_osx_pyobjc": "pyobjc",
+    "paste_gtk": "gtk",
+    "paste_qt": "qt",
+    "paste_xclip": "xclip",
+    "paste_xsel": "xsel",
+    "paste_wl": "wl-clipboard",
+    "paste_klipper": "klipper",
+    "paste_windows": "windows",
+}
+
 WORDS_MAPPING = {
     "pt": [
         {"text_input": "PT1", "kind": "frequent", "locale": "pt_PT", "language": "pt"},
@@ -50,6 +167,13 @@ WORDS_MAPPING = {
         {"text_input": "FR2", "kind": "hard", "locale": "fr_FR", "language": "fr"},
     ],
 }
+# sessions drawn from the word index of a locale, see parse_selection
+WORD_SELECTIONS = [
+    {"text_input": "LH", "language": "pt", "locale": "pt_PT", "selection": "contains=lh"},
+    {"text_input": "NH", "language": "pt", "locale": "pt_PT", "selection": "contains=nh"},
+    {"text_input": "CH", "language": "pt", "locale": "pt_PT", "selection": "contains=ch"},
+    {"text_input": "RR", "language": "pt", "locale": "pt_PT", "selection": "contains=rr"},
+]
 
 
 def resource_path(*relative_path):
@@ -63,9 +187,1716 @@ def asset_item_path(*file):
     return resource_path(ASSETS_PATH, *file)
 
 
+def asset_item_file(*file):
+    """
+    Get an asset item as pygame loads it: an in-memory file object with a copy of the member of the asset pack
+    (the image and sound decoders of pygame take files, not buffers), or its path
+    """
+    pack = load_asset_pack()
+    if pack is not None and pack.name(ASSETS_PATH, *file) in pack:
+        return BytesIO(pack.view(ASSETS_PATH, *file))
+    return asset_item_path(*file)
+
+
+def read_resource(*relative_path):
+    """Returns a copy of the content of a resource, from the asset pack or its file"""
+    pack = load_asset_pack()
+    if pack is not None and pack.name(*relative_path) in pack:
+        return bytes(pack.view(*relative_path))
+    with open(resource_path(*relative_path), "rb") as f:
+        return f.read()
+
+
+def map_resource(*relative_path):
+    """Returns the content of a resource without reading it: a view of the asset pack or the memory-mapped file"""
+    pack = load_asset_pack()
+    if pack is not None and pack.name(*relative_path) in pack:
+        return pack.view(*relative_path)
+    with open(resource_path(*relative_path), "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def cache_path(*file):
+    """Get absolute path to an item of the user cache directory (LEDORA_CACHE_DIR overrides it)"""
+    base_path = environ.get("LEDORA_CACHE_DIR")
+    if not base_path:
+        if sys.platform == "win32":
+            base_path = path.join(environ.get("LOCALAPPDATA", path.expanduser("~")), APP_NAME, "cache")
+        elif sys.platform == "darwin":
+            base_path = path.join(path.expanduser("~"), "Library", "Caches", APP_NAME)
+        else:
+            base_path = path.join(environ.get("XDG_CACHE_HOME", path.expanduser("~/.cache")), APP_NAME.lower())
+    return path.join(base_path, *file)
+
+
+def data_path(*file):
+    """Get absolute path to an item of the user data directory (LEDORA_DATA_DIR overrides it)"""
+    base_path = environ.get("LEDORA_DATA_DIR")
+    if not base_path:
+        if sys.platform == "win32":
+            base_path = path.join(environ.get("APPDATA", path.expanduser("~")), APP_NAME)
+        elif sys.platform == "darwin":
+            base_path = path.join(path.expanduser("~"), "Library", "Application Support", APP_NAME)
+        else:
+            base_path = path.join(environ.get("XDG_DATA_HOME", path.expanduser("~/.local/share")), APP_NAME.lower())
+    return path.join(base_path, *file)
+
+
+def write_atomic(file, data):
+    """Write bytes to a file through a temporary file, so readers never see it half written"""
+    makedirs(path.dirname(file), exist_ok=True)
+    tmp = f"{file}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    replace(tmp, file)
+
+
+def pyphen_version():
+    """Returns the version of pyphen, the hyphenation dictionaries change with it"""
+    import pyphen
+
+    return pyphen.__version__
+
+
+@lru_cache(maxsize=None)
+def get_pyphen(locale, left=1, right=1):
+    """Returns the Pyphen instance of the locale, the hyphenation dictionary is parsed once"""
+    import pyphen
+
+    return pyphen.Pyphen(lang=locale, left=left, right=right)
+
+
+class SyllableCache:
+    """
+    Persistent word -> syllable positions cache of one locale, pyphen version and left/right
+    settings: known words need no hyphenation and new words are added incrementally
+    """
+
+    def __init__(self, locale, left=1, right=1):
+        self.locale = locale
+        self.left = left
+        self.right = right
+        self.header = {
+            "version": SYLLABLE_CACHE_VERSION,
+            "locale": locale,
+            "pyphen": pyphen_version(),
+            "left": left,
+            "right": right,
+        }
+        self.file = cache_path("syllables", f"{locale}-{left}-{right}-pyphen{pyphen_version()}.json")
+        # new words are appended to the journal, merged into the file once it outgrows it
+        self.journal = f"{self.file}l"
+        self.lock = Lock()
+        # words in the file (None if it must be rewritten) and in the journal
+        self.stored = None
+        self.journaled = 0
+        # words hyphenated since the last save
+        self.pending = {}
+        self.words = self.load()
+
+    @property
+    def dirty(self):
+        return bool(self.pending)
+
+    def load(self):
+        """
+        Read the cached positions and the journal, discarding files of other versions or settings
+        :return: dict of word -> positions
+        """
+        try:
+            with open(self.file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("header") != self.header:
+            return {}
+        words = data.get("words", {})
+        self.stored = len(words)
+        try:
+            with open(self.journal, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries = json.loads(line)
+                    except ValueError:
+                        # the last line of a save cut short
+                        break
+                    words.update(entries)
+                    self.journaled += len(entries)
+        except OSError:
+            pass
+        return words
+
+    def save(self):
+        """Append the new words to the journal, or rewrite the file when the journal would outgrow it"""
+        with self.lock:
+            if not self.pending:
+                return
+            pending, self.pending = self.pending, {}
+            try:
+                if self.stored is None or self.journaled + len(pending) > self.stored:
+                    data = {"header": self.header, "words": self.words}
+                    write_atomic(self.file, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+                    self.stored, self.journaled = len(self.words), 0
+                    if path.exists(self.journal):
+                        remove(self.journal)
+                else:
+                    with open(self.journal, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(pending, ensure_ascii=False, separators=(",", ":")) + "\n")
+                    self.journaled += len(pending)
+            except OSError:
+                print("Syllable cache not saved")
+
+    def positions(self, words, save=True):
+        """
+        Returns the syllable positions of the words, hyphenating and saving only the unknown ones
+        :param words:
+        :param save: False to leave the saving of the new words to the caller
+        :return: list of positions
+        """
+        known = self.words
+        missing = {word for word in words if word not in known}
+        if missing:
+            pp = get_pyphen(self.locale, self.left, self.right)
+            with self.lock:
+                for word in missing:
+                    known[word] = self.pending[word] = pp.positions(word)
+            if save:
+                self.save()
+        return [known[word] for word in words]
+
+
+@lru_cache(maxsize=None)
+def get_syllable_cache(locale, left=1, right=1):
+    """Returns the syllable cache of the locale, loaded once"""
+    return SyllableCache(locale, left, right)
+
+
+def tokenize(text):
+    """Split a text in words on spaces and line breaks, lazily"""
+    return (match.group() for match in re.finditer(r"[^ \r\n]+", text))
+
+
+class WordStream:
+    """
+    Tokenizes and syllabifies a text in a worker thread and feeds the batches through a bounded
+    queue, so that playback can start as soon as the first batch is ready
+    """
+
+    def __init__(self, text, locale, shuffle_=False, batch_size=WORD_BATCH_SIZE, maxsize=WORD_QUEUE_SIZE):
+        self.queue = Queue(maxsize)
+        self.cancelled = Event()
+        self.thread = Thread(target=self.run, args=(text, locale, shuffle_, batch_size), daemon=True)
+        self.thread.start()
+
+    def run(self, text, locale, shuffle_, batch_size):
+        cache = get_syllable_cache(locale)
+        words = tokenize(text)
+        if shuffle_:
+            words = list(words)
+            shuffle(words)
+        batch = []
+        for word in words:
+            batch.append(word)
+            if len(batch) == batch_size:
+                if not self.put((batch, cache.positions(batch, save=False))):
+                    return
+                batch = []
+        if batch and not self.put((batch, cache.positions(batch, save=False))):
+            return
+        if cache.dirty:
+            cache.save()
+        self.put(None)
+
+    def put(self, item):
+        """
+        Put an item in the queue, giving up if the stream is cancelled
+        :param item:
+        :return: False if cancelled
+        """
+        while not self.cancelled.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def fetch(self, block=True):
+        """
+        Returns the next batch of words and positions, None at the end of the text
+        or False if no batch is ready and block is False
+        :param block:
+        :return:
+        """
+        try:
+            return self.queue.get(block)
+        except Empty:
+            return False
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+def source_stamp(file):
+    """Returns the size and the crc32 of a source file, used to detect stale compiled corpora"""
+    with open(file, "rb") as f:
+        return content_stamp(f.read())
+
+
+def content_stamp(data):
+    """Returns the size and the crc32 of the content of a source"""
+    return len(data), zlib.crc32(data)
+
+
+def compile_corpus(words, positions, locale, stamp=(0, 0)):
+    """
+    Compile words and their syllable positions in the corpus format: a header, the offsets of the words
+    and of their positions (uint32), the positions (uint16) and the UTF-8 blob of the words
+    :param words:
+    :param positions:
+    :param locale:
+    :param stamp: size and crc32 of the source
+    :return: bytes
+    """
+    encoded = [word.encode("utf-8") for word in words]
+    word_offsets, position_offsets, flat_positions = array("I", [0]), array("I", [0]), array("H")
+    for word, word_positions in zip(encoded, positions):
+        word_offsets.append(word_offsets[-1] + len(word))
+        flat_positions.extend(word_positions)
+        position_offsets.append(len(flat_positions))
+    if len(flat_positions) % 2:
+        flat_positions.append(0)
+    header = CORPUS_HEADER.pack(
+        CORPUS_MAGIC,
+        CORPUS_VERSION,
+        0,
+        len(encoded),
+        position_offsets[-1],
+        word_offsets[-1],
+        stamp[1],
+        stamp[0],
+        pyphen_version().encode("ascii"),
+        locale.encode("ascii"),
+    )
+    if sys.byteorder != "little":
+        for values in (word_offsets, position_offsets, flat_positions):
+            values.byteswap()
+    return b"".join([header, word_offsets.tobytes(), position_offsets.tobytes(), flat_positions.tobytes(), *encoded])
+
+
+class Corpus(Sequence):
+    """
+    Compiled word list read straight from a (memory-mapped) buffer: words and positions are only
+    decoded when accessed
+    """
+
+    def __init__(self, buffer, file=None):
+        self.file = file
+        self.buffer = buffer
+        magic, version, _, n, n_positions, blob_size, crc, size, pyphen_version, locale = CORPUS_HEADER.unpack_from(
+            buffer
+        )
+        if magic != CORPUS_MAGIC or version != CORPUS_VERSION:
+            raise ValueError(f"Not a corpus of version {CORPUS_VERSION}")
+        self.stamp = size, crc
+        self.pyphen_version = pyphen_version.rstrip(b"\0").decode("ascii")
+        self.locale = locale.rstrip(b"\0").decode("ascii")
+
+        view = memoryview(buffer)
+        offset = CORPUS_HEADER.size
+        self.word_offsets = self.cast(view[offset : offset + 4 * (n + 1)], "I")
+        offset += 4 * (n + 1)
+        self.position_offsets = self.cast(view[offset : offset + 4 * (n + 1)], "I")
+        offset += 4 * (n + 1)
+        self.positions_ = self.cast(view[offset : offset + 2 * n_positions], "H")
+        offset += 2 * (n_positions + n_positions % 2)
+        self.blob = view[offset : offset + blob_size]
+
+    @staticmethod
+    def cast(view, fmt):
+        if sys.byteorder == "little":
+            return view.cast(fmt)
+        values = array(fmt, view.tobytes())
+        values.byteswap()
+        return values
+
+    @classmethod
+    def open(cls, file):
+        """
+        Memory-map a compiled corpus file
+        :param file:
+        :return:
+        """
+        with open(file, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), file)
+
+    def __len__(self):
+        return len(self.word_offsets) - 1
+
+    def __getitem__(self, index):
+        return str(self.blob[self.word_offsets[index] : self.word_offsets[index + 1]], "utf-8")
+
+    def positions(self, index):
+        """
+        Returns the syllable positions of a word
+        :param index:
+        :return:
+        """
+        return self.positions_[self.position_offsets[index] : self.position_offsets[index + 1]].tolist()
+
+    def permutation(self, rnd=None):
+        """
+        Returns a shuffled permutation of the indexes of the words
+        :param rnd: random.Random instance, None for the global one
+        :return: array
+        """
+        order = array("I", range(len(self)))
+        (rnd.shuffle if rnd is not None else shuffle)(order)
+        return order
+
+
+class CorpusWords(Sequence):
+    """
+    Words of a corpus in the order of a permutation of its indexes
+    """
+
+    def __init__(self, corpus, order):
+        self.corpus = corpus
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return type(self)(self.corpus, self.order[index])
+        return self.corpus[self.order[index]]
+
+    @property
+    def positions(self):
+        return CorpusPositions(self.corpus, self.order)
+
+
+class CorpusPositions(CorpusWords):
+    """
+    Syllable positions of the words of a corpus in the order of a permutation of its indexes
+    """
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return type(self)(self.corpus, self.order[index])
+        return self.corpus.positions(self.order[index])
+
+
+def build_corpus(language, kind, locale, file=None):
+    """
+    Compile the word list of a language and kind
+    :param language:
+    :param kind:
+    :param locale:
+    :param file: target file, the compiled file next to the word list by default
+    :return: target file
+    """
+    # from the asset pack in builds that ship the word lists only there
+    source = read_resource("txts", f"{language}_{kind}.txt")
+    words = list(tokenize(source.decode("utf-8")))
+    data = compile_corpus(words, get_syllable_cache(locale).positions(words), locale, content_stamp(source))
+    file = file or resource_path("txts", f"{language}_{kind}.ldc")
+    write_atomic(file, data)
+    return file
+
+
+def syllabify(locale, words):
+    """Worker of build_corpora: syllable positions of the words, with the Pyphen instance of the process"""
+    pp = get_pyphen(locale)
+    return [pp.positions(word) for word in words]
+
+
+def hyphenate(word, positions):
+    """Returns the word with a hyphen at each syllable position"""
+    bounds = [0, *positions, len(word)]
+    return "-".join(word[start:end] for start, end in zip(bounds, bounds[1:]))
+
+
+def word_list_locale(file):
+    """Returns the locale of a {language}_{kind}.txt word list, None if the language is unknown"""
+    items = WORDS_MAPPING.get(path.basename(file).split("_")[0], [])
+    return items[0]["locale"] if items else None
+
+
+def build_corpora(jobs, workers=None, chunk_size=CORPUS_CHUNK_SIZE):
+    """
+    Compile word lists, syllabifying their words in chunks in a pool of processes
+    :param jobs: list of (source, target, locale)
+    :param workers: number of processes, one per CPU by default
+    :param chunk_size: words per task
+    :return: list of dicts with the target, the number of words and, compared to the previous target if any,
+        the words added, removed and the words whose split changed, as (word, previous, new positions)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tasks = []
+        for source, target, locale in jobs:
+            with open(source, encoding="utf-8") as f:
+                words = list(tokenize(f.read()))
+            unique = list(dict.fromkeys(words))
+            futures = [
+                pool.submit(syllabify, locale, unique[i : i + chunk_size]) for i in range(0, len(unique), chunk_size)
+            ]
+            tasks.append((source, target, locale, words, unique, futures))
+
+        reports = []
+        for source, target, locale, words, unique, futures in tasks:
+            known = dict(zip(unique, (positions for future in futures for positions in future.result())))
+            try:
+                # read, not mapped: the target is replaced below
+                with open(target, "rb") as f:
+                    corpus = Corpus(f.read())
+                previous = {corpus[i]: corpus.positions(i) for i in range(len(corpus))}
+            except (OSError, ValueError):
+                previous = None
+
+            write_atomic(target, compile_corpus(words, [known[word] for word in words], locale, source_stamp(source)))
+            report = {"target": target, "words": len(words), "added": [], "removed": [], "changed": []}
+            if previous is not None:
+                report["added"] = [word for word in unique if word not in previous]
+                report["removed"] = [word for word in previous if word not in known]
+                report["changed"] = [
+                    (word, previous[word], known[word])
+                    for word in unique
+                    if word in previous and previous[word] != known[word]
+                ]
+            reports.append(report)
+    return reports
+
+
+@lru_cache(maxsize=None)
+def load_corpus(language, kind, locale):
+    """
+    Returns the compiled corpus of a language and kind: the one shipped next to the word list
+    if it is up to date with it and with pyphen, otherwise one compiled on demand in the cache directory
+    :param language:
+    :param kind:
+    :param locale:
+    :return:
+    """
+    source = resource_path("txts", f"{language}_{kind}.txt")
+    # frozen builds ship the word lists and their compiled corpora together
+    stamp = None if getattr(sys, "frozen", False) or not path.exists(source) else source_stamp(source)
+    version = pyphen_version()
+    shipped, cached = f"{language}_{kind}.ldc", cache_path("corpus", f"{language}_{kind}.ldc")
+    for open_corpus in (
+        lambda: Corpus(map_resource("txts", shipped), resource_path("txts", shipped)),
+        lambda: Corpus.open(cached),
+    ):
+        try:
+            corpus = open_corpus()
+        except (OSError, ValueError, struct.error):
+            continue
+        # the syllable splits change with the hyphenation dictionaries of pyphen
+        if corpus.locale == locale and corpus.pyphen_version == version and (stamp is None or corpus.stamp == stamp):
+            return corpus
+    return Corpus.open(build_corpus(language, kind, locale, cache_path("corpus", f"{language}_{kind}.ldc")))
+
+
+def compile_word_index(words, positions, locale, stamp=0, ngram=WORD_INDEX_NGRAM):
+    """
+    Compile the index of the words of a locale: the words (in the corpus format, at the end), their length
+    and syllable count (uint16 and uint8), the words sorted by syllable count with the offset of each count, and the
+    words containing each n-gram (lowercase, 1 to ngram letters) with the sorted UTF-8 n-grams
+    :param words: unique words
+    :param positions:
+    :param locale:
+    :param stamp: word_index_stamp of the corpora of the words
+    :param ngram: longest n-gram
+    :return: bytes
+    """
+    lengths = array("H", (len(word) for word in words))
+    syllables = array("B", (min(len(word_positions) + 1, 255) for word_positions in positions))
+    by_syllables = array("I", sorted(range(len(words)), key=syllables.__getitem__))
+    syllable_offsets = array("I", [0] * (max(syllables, default=0) + 2))
+    for count in syllables:
+        syllable_offsets[count + 1] += 1
+    for count in range(1, len(syllable_offsets)):
+        syllable_offsets[count] += syllable_offsets[count - 1]
+
+    grams = {}
+    for index, word in enumerate(words):
+        word = word.lower()
+        for size in range(1, ngram + 1):
+            for gram in {word[i : i + size] for i in range(len(word) - size + 1)}:
+                grams.setdefault(gram.encode("utf-8"), array("I")).append(index)
+    keys = sorted(grams)
+    key_offsets, posting_offsets, postings = array("I", [0]), array("I", [0]), array("I")
+    for key in keys:
+        key_offsets.append(key_offsets[-1] + len(key))
+        postings.extend(grams[key])
+        posting_offsets.append(len(postings))
+    blob = b"".join(keys)
+
+    header = WORD_INDEX_HEADER.pack(
+        WORD_INDEX_MAGIC,
+        WORD_INDEX_VERSION,
+        ngram,
+        len(words),
+        len(syllable_offsets),
+        len(keys),
+        len(postings),
+        len(blob),
+        stamp,
+        locale.encode("ascii"),
+    )
+    sections = [lengths, syllables, by_syllables, syllable_offsets, key_offsets, posting_offsets, postings]
+    if sys.byteorder != "little":
+        for values in sections:
+            values.byteswap()
+    chunks = [header]
+    for values in sections:
+        data = values.tobytes()
+        chunks += [data, bytes(-len(data) % 4)]
+    chunks += [blob, bytes(-len(blob) % 4), compile_corpus(words, positions, locale)]
+    return b"".join(chunks)
+
+
+class WordIndex:
+    """
+    Index of the words of a locale read straight from a (memory-mapped) buffer, to draw the words
+    of a given length, syllable count or containing given letters
+    """
+
+    def __init__(self, buffer, file=None):
+        self.file = file
+        self.buffer = buffer
+        magic, version, ngram, n, n_offsets, n_keys, n_postings, blob_size, stamp, locale = (
+            WORD_INDEX_HEADER.unpack_from(buffer)
+        )
+        if magic != WORD_INDEX_MAGIC or version != WORD_INDEX_VERSION:
+            raise ValueError(f"Not a word index of version {WORD_INDEX_VERSION}")
+        self.ngram = ngram
+        self.stamp = stamp
+        self.locale = locale.rstrip(b"\0").decode("ascii")
+
+        view = memoryview(buffer)
+        offset = WORD_INDEX_HEADER.size
+        sections = []
+        for fmt, size in (("H", n), ("B", n), ("I", n), ("I", n_offsets), ("I", n_keys + 1), ("I", n_keys + 1)):
+            sections.append(Corpus.cast(view[offset : offset + size * array(fmt).itemsize], fmt))
+            offset += size * array(fmt).itemsize
+            offset += -offset % 4
+        self.lengths, self.syllables, self.by_syllables, self.syllable_offsets, self.key_offsets = sections[:5]
+        self.posting_offsets = sections[5]
+        self.postings_ = Corpus.cast(view[offset : offset + 4 * n_postings], "I")
+        offset += 4 * n_postings
+        self.keys = view[offset : offset + blob_size]
+        offset += blob_size + -blob_size % 4
+        self.corpus = Corpus(view[offset:])
+
+    @classmethod
+    def open(cls, file):
+        """
+        Memory-map a word index file
+        :param file:
+        :return:
+        """
+        with open(file, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), file)
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def postings(self, gram):
+        """
+        Returns the indexes of the words containing an n-gram, binary searched among the sorted n-grams
+        :param gram: lowercase, at most ngram letters
+        :return:
+        """
+        key = gram.encode("utf-8")
+        low, high = 0, len(self.key_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if bytes(self.keys[self.key_offsets[middle] : self.key_offsets[middle + 1]]) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.key_offsets) - 1 and self.keys[self.key_offsets[low] : self.key_offsets[low + 1]] == key:
+            return self.postings_[self.posting_offsets[low] : self.posting_offsets[low + 1]]
+        return self.postings_[0:0]
+
+    def select(self, count=SELECTION_WORDS, syllables=None, length=None, contains=None, rnd=None):
+        """
+        Draw words at random, without replacement, among those matching all the filters. The candidates are
+        the smallest of the words containing the rarest n-gram of the letters and the words of the syllable
+        counts, drawn one by one and checked until enough words match.
+        :param count: number of words, fewer if not enough match
+        :param syllables: (min, max) syllables
+        :param length: (min, max) letters
+        :param contains: letters the words must contain
+        :param rnd: random.Random instance, None for the global one
+        :return: array of the indexes of the words in the corpus of the index
+        """
+        candidates = range(len(self))
+        if contains:
+            contains = contains.lower()
+            size = min(len(contains), self.ngram)
+            candidates = min((self.postings(contains[i : i + size]) for i in range(len(contains) - size + 1)), key=len)
+        if syllables is not None:
+            last = len(self.syllable_offsets) - 1
+            low, high = min(max(syllables[0], 0), last), min(max(syllables[1] + 1, 0), last)
+            bucket = self.by_syllables[self.syllable_offsets[low] : self.syllable_offsets[max(low, high)]]
+            if len(bucket) < len(candidates):
+                candidates = bucket
+
+        # Fisher-Yates shuffle of the candidates left in place: only the swapped ones are kept, in a dict
+        swapped = {}
+        draw = rnd.randrange if rnd is not None else randrange
+        selected = array("I")
+        end = len(candidates)
+        while end and len(selected) < count:
+            i = draw(end)
+            end -= 1
+            index = swapped.get(i, candidates[i])
+            swapped[i] = swapped.get(end, candidates[end])
+            if syllables is not None and not syllables[0] <= self.syllables[index] <= syllables[1]:
+                continue
+            if length is not None and not length[0] <= self.lengths[index] <= length[1]:
+                continue
+            if contains and contains not in self.corpus[index].lower():
+                continue
+            selected.append(index)
+        return selected
+
+
+def parse_selection(spec):
+    """
+    Parse a word selection like "syllables=2,contains=lh,count=20": syllables and length are a number
+    or a min-max range
+    :param spec:
+    :return: keyword arguments of WordIndex.select
+    """
+    selection = {}
+    for item in filter(None, spec.split(",")):
+        key, _, value = (part.strip() for part in item.partition("="))
+        if key in ("syllables", "length"):
+            low, _, high = value.partition("-")
+            selection[key] = int(low), int(high or low)
+        elif key == "count":
+            selection[key] = int(value)
+        elif key == "contains":
+            selection[key] = value
+        else:
+            raise ValueError(f"Unknown filter of the word selection: {key}")
+    return selection
+
+
+def locale_corpora(locale):
+    """Returns the language and kind of the word lists of a locale"""
+    return [
+        (item["language"], item["kind"])
+        for items in WORDS_MAPPING.values()
+        for item in items
+        if item["locale"] == locale
+    ]
+
+
+def word_index_stamp(corpora):
+    """Returns the crc32 of the source stamps and pyphen versions of the corpora of a word index"""
+    return zlib.crc32(
+        b"".join(struct.pack("<QI16s", *corpus.stamp, corpus.pyphen_version.encode("ascii")) for corpus in corpora)
+    )
+
+
+def build_word_index(locale, file=None):
+    """
+    Compile the index of the word lists of a locale, from their compiled corpora
+    :param locale:
+    :param file: target file, the index in the word lists directory by default
+    :return: target file
+    """
+    corpora = [load_corpus(language, kind, locale) for language, kind in locale_corpora(locale)]
+    positions = {}
+    for corpus in corpora:
+        for index in range(len(corpus)):
+            positions.setdefault(corpus[index], corpus.positions(index))
+    stamp = word_index_stamp(corpora)
+    file = file or resource_path("txts", f"{locale}.ldi")
+    write_atomic(file, compile_word_index(list(positions), list(positions.values()), locale, stamp))
+    return file
+
+
+@lru_cache(maxsize=None)
+def load_word_index(locale):
+    """
+    Returns the word index of a locale: the one shipped with the word lists if it was compiled from their
+    current corpora, otherwise one compiled on demand in the cache directory
+    :param locale:
+    :return:
+    """
+    corpora = [load_corpus(language, kind, locale) for language, kind in locale_corpora(locale)]
+    stamp = word_index_stamp(corpora)
+    shipped, cached = f"{locale}.ldi", cache_path("index", f"{locale}.ldi")
+    for open_index in (
+        lambda: WordIndex(map_resource("txts", shipped), resource_path("txts", shipped)),
+        lambda: WordIndex.open(cached),
+    ):
+        try:
+            index = open_index()
+        except (OSError, ValueError, struct.error):
+            continue
+        if index.locale == locale and index.stamp == stamp:
+            return index
+    return WordIndex.open(build_word_index(locale, cache_path("index", f"{locale}.ldi")))
+
+
+class AssetPack:
+    """
+    Archive of the assets and word lists read straight from a (memory-mapped) buffer: an index of the members
+    (offset, size and name) followed by their contents, each aligned to ASSET_PACK_ALIGN bytes
+    """
+
+    def __init__(self, buffer, file=None):
+        self.file = file
+        self.buffer = buffer
+        magic, version, _, n, names_size = ASSET_PACK_HEADER.unpack_from(buffer)
+        if magic != ASSET_PACK_MAGIC or version != ASSET_PACK_VERSION:
+            raise ValueError(f"Not an asset pack of version {ASSET_PACK_VERSION}")
+
+        view = memoryview(buffer)
+        names_offset = ASSET_PACK_HEADER.size + n * ASSET_PACK_ENTRY.size
+        names = bytes(view[names_offset : names_offset + names_size])
+        self.members = {}
+        name_offset = 0
+        for offset, size, name_size in ASSET_PACK_ENTRY.iter_unpack(view[ASSET_PACK_HEADER.size : names_offset]):
+            name = names[name_offset : name_offset + name_size].decode("utf-8")
+            self.members[name] = view[offset : offset + size]
+            name_offset += name_size
+
+    @classmethod
+    def open(cls, file):
+        """
+        Memory-map an asset pack file
+        :param file:
+        :return:
+        """
+        with open(file, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), file)
+
+    @staticmethod
+    def name(*relative_path):
+        """Returns the name of the member of a resource path"""
+        return "/".join(relative_path)
+
+    def __contains__(self, name):
+        return name in self.members
+
+    def __iter__(self):
+        return iter(self.members)
+
+    def __len__(self):
+        return len(self.members)
+
+    def view(self, *relative_path):
+        """
+        Returns the content of a member without copying it
+        :param relative_path: path of the resource, like ("assets", "imgs", "logo.png")
+        :return: memoryview
+        """
+        return self.members[self.name(*relative_path)]
+
+
+def compile_asset_pack(members):
+    """
+    Compile an asset pack
+    :param members: (name, content) pairs, the names are relative paths with "/" separators
+    :return: bytes
+    """
+    names = [name.encode("utf-8") for name, _ in members]
+    offset = ASSET_PACK_HEADER.size + len(members) * ASSET_PACK_ENTRY.size + sum(map(len, names))
+    entries, chunks = [], []
+    for name, (_, data) in zip(names, members):
+        padding = -offset % ASSET_PACK_ALIGN
+        chunks += [bytes(padding), data]
+        offset += padding
+        entries.append(ASSET_PACK_ENTRY.pack(offset, len(data), len(name)))
+        offset += len(data)
+    header = ASSET_PACK_HEADER.pack(ASSET_PACK_MAGIC, ASSET_PACK_VERSION, 0, len(members), sum(map(len, names)))
+    return b"".join([header, *entries, *names, *chunks])
+
+
+def build_asset_pack(file=None):
+    """
+    Pack the files of the assets and word lists directories (with the compiled corpora and word indexes)
+    :param file: target file, ledora.ldp next to the game by default
+    :return: target file
+    """
+    members = []
+    for directory in ASSET_PACK_DIRS:
+        for root, dirs, files in walk(resource_path(directory)):
+            dirs[:] = sorted(d for d in dirs if d != "__pycache__")
+            for name in sorted(files):
+                relative = path.relpath(path.join(root, name), resource_path())
+                with open(path.join(root, name), "rb") as f:
+                    members.append((AssetPack.name(*relative.split(path.sep)), f.read()))
+    file = file or resource_path(ASSET_PACK)
+    write_atomic(file, compile_asset_pack(members))
+    return file
+
+
+@lru_cache(maxsize=None)
+def load_asset_pack():
+    """
+    Returns the asset pack of the game: the one shipped with frozen builds, or the file of LEDORA_ASSETS;
+    None for the loose files (development, LEDORA_ASSETS=loose or no pack)
+    :return:
+    """
+    file = environ.get("LEDORA_ASSETS") or (resource_path(ASSET_PACK) if getattr(sys, "frozen", False) else "loose")
+    if file == "loose":
+        return None
+    try:
+        return AssetPack.open(file)
+    except (OSError, ValueError):
+        return None
+
+
+class StartupProfiler:
+    """
+    Per-phase timing of the startup, printed by --startup-profile
+    """
+
+    def __init__(self, start=STARTED_AT):
+        self.start = self.last = start
+        self.phases = []
+
+    def mark(self, phase):
+        """
+        End a phase
+        :param phase: name of the phase
+        :return:
+        """
+        now = perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        width = max(len(phase) for phase, _ in self.phases)
+        for phase, duration in self.phases:
+            print(f"{phase:<{width}}  {duration * 1000:8.1f} ms")
+        print(f"{'total':<{width}}  {(self.last - self.start) * 1000:8.1f} ms")
+
+
+class VirtualClock:
+    """
+    Clock of a replayed session, moved forward by the replay instead of by the time passing
+    """
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class SessionLog:
+    """
+    Compact record of a play session: what is needed to draw the same words (seed, word list
+    or selection and the hash of the words, clipboard text) and the key events timestamped from the start of the session
+    """
+
+    def __init__(
+        self,
+        language,
+        locale,
+        kind,
+        clipboard_=False,
+        seed=None,
+        text=None,
+        words_hash=None,
+        events=None,
+        selection=None,
+    ):
+        self.language = language
+        self.locale = locale
+        self.kind = kind
+        self.clipboard_ = clipboard_
+        self.seed = seed
+        self.text = text
+        self.words_hash = words_hash
+        self.events = events if events is not None else []
+        self.selection = selection
+
+    @staticmethod
+    def hash_words(words):
+        """
+        Returns the crc32 of the words in their order
+        :param words:
+        :return:
+        """
+        crc = 0
+        for word in words:
+            crc = zlib.crc32(word.encode("utf-8") + b"\n", crc)
+        return crc
+
+    def key(self, at, key):
+        """
+        Record a key event
+        :param at: seconds since the start of the session
+        :param key: pygame key code
+        :return:
+        """
+        self.events.append((round(at, 4), pg.key.name(key)))
+
+    def keys(self):
+        """
+        Returns the recorded key events as (seconds since the start, pygame key code)
+        :return:
+        """
+        return [(at, pg.key.key_code(name)) for at, name in self.events]
+
+    def save(self, file):
+        data = {
+            "version": SESSION_LOG_VERSION,
+            "language": self.language,
+            "locale": self.locale,
+            "kind": self.kind,
+            "clipboard": self.clipboard_,
+            "seed": self.seed,
+            "text": self.text,
+            "words_hash": self.words_hash,
+            "events": self.events,
+            "selection": self.selection,
+        }
+        write_atomic(file, json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    @classmethod
+    def load(cls, file):
+        with open(file, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SESSION_LOG_VERSION:
+            raise ValueError(f"{file}: unsupported session log version {data.get('version')}")
+        return cls(
+            data["language"],
+            data["locale"],
+            data["kind"],
+            clipboard_=data["clipboard"],
+            seed=data["seed"],
+            text=data["text"],
+            words_hash=data["words_hash"],
+            events=[tuple(event) for event in data["events"]],
+            selection=data.get("selection"),
+        )
+
+
+class TelemetryStore:
+    """
+    Append-only SQLite store of the play sessions and of each of their words, for the history of each child;
+    the sessions are queued and written in batches by a worker thread, away from the render loop
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY,
+            child TEXT NOT NULL,
+            started REAL NOT NULL,
+            language TEXT,
+            kind TEXT,
+            locale TEXT,
+            finished INTEGER NOT NULL,
+            words INTEGER NOT NULL,
+            syllables INTEGER NOT NULL,
+            seconds REAL NOT NULL,
+            fails INTEGER NOT NULL,
+            pauses INTEGER NOT NULL,
+            stars INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS sessions_child_started ON sessions (child, started);
+        CREATE TABLE IF NOT EXISTS words (
+            session INTEGER NOT NULL REFERENCES sessions (id),
+            position INTEGER NOT NULL,
+            word TEXT NOT NULL,
+            syllables INTEGER NOT NULL,
+            shown REAL NOT NULL,
+            retries INTEGER NOT NULL,
+            pauses INTEGER NOT NULL,
+            PRIMARY KEY (session, position)
+        ) WITHOUT ROWID;
+    """
+    SESSION_COLUMNS = (
+        "child",
+        "started",
+        "language",
+        "kind",
+        "locale",
+        "finished",
+        "words",
+        "syllables",
+        "seconds",
+        "fails",
+        "pauses",
+        "stars",
+    )
+
+    def __init__(self, file):
+        self.file = file
+        self.queue = Queue()
+        self.writer = None
+
+    def connect(self):
+        import sqlite3
+
+        makedirs(path.dirname(self.file), exist_ok=True)
+        connection = sqlite3.connect(self.file)
+        # readers (the history screen) do not block the writer
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(self.SCHEMA)
+        return connection
+
+    def record(self, session, words):
+        """
+        Queue a session to be written
+        :param session: dict with the SESSION_COLUMNS
+        :param words: list of (word, syllables, seconds shown, retries, pauses)
+        :return:
+        """
+        if self.writer is None:
+            self.writer = Thread(target=self.write, daemon=True)
+            self.writer.start()
+        self.queue.put((session, words))
+
+    def write(self):
+        """
+        Worker thread: write everything queued in one transaction, until close
+        :return:
+        """
+        import sqlite3
+
+        connection = self.connect()
+        insert_session = (
+            f"INSERT INTO sessions ({', '.join(self.SESSION_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(self.SESSION_COLUMNS))})"
+        )
+        closing = False
+        while not closing:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Empty:
+                    break
+            closing = None in batch
+            try:
+                with connection:
+                    for item in batch:
+                        if item is None:
+                            continue
+                        session, words = item
+                        cursor = connection.execute(insert_session, [session[c] for c in self.SESSION_COLUMNS])
+                        connection.executemany(
+                            "INSERT INTO words VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            [(cursor.lastrowid, i, *word) for i, word in enumerate(words)],
+                        )
+            except sqlite3.Error as e:
+                print(f"Telemetry not saved: {e}")
+        connection.close()
+
+    def close(self):
+        """
+        Write what is queued and stop the writer
+        :return:
+        """
+        if self.writer is not None:
+            self.queue.put(None)
+            self.writer.join()
+            self.writer = None
+
+    def history(self, child, since=0, months=HISTORY_MONTHS, hardest=HISTORY_HARDEST_WORDS):
+        """
+        Aggregate the finished sessions of a child
+        :param child:
+        :param since: unix time of the first session
+        :param months: number of months of the monthly totals, the latest
+        :param hardest: number of words with the most retries
+        :return: dict with the totals, the monthly totals and the hardest words
+        """
+        connection = self.connect()
+        try:
+            totals = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(words), 0), COALESCE(SUM(syllables), 0), COALESCE(SUM(seconds), 0), "
+                "COALESCE(SUM(fails), 0) FROM sessions WHERE child = ? AND started >= ? AND finished",
+                (child, since),
+            ).fetchone()
+            monthly = connection.execute(
+                "SELECT strftime('%Y-%m', started, 'unixepoch', 'localtime') AS month, COUNT(*), SUM(words), "
+                "SUM(syllables), SUM(seconds), SUM(fails) FROM sessions WHERE child = ? AND started >= ? AND finished "
+                "GROUP BY month ORDER BY month DESC LIMIT ?",
+                (child, since, months),
+            ).fetchall()
+            words = connection.execute(
+                "SELECT w.word, SUM(w.retries) AS retries FROM sessions s JOIN words w ON w.session = s.id "
+                "WHERE s.child = ? AND s.started >= ? AND s.finished GROUP BY w.word HAVING retries > 0 "
+                "ORDER BY retries DESC, w.word LIMIT ?",
+                (child, since, hardest),
+            ).fetchall()
+        finally:
+            connection.close()
+
+        def totals_dict(sessions, words_, syllables, seconds, fails):
+            return {
+                "sessions": sessions,
+                "words": words_,
+                "syllables": syllables,
+                "seconds": seconds,
+                "fails": fails,
+                "words_per_minute": int(words_ / seconds * 60) if seconds else 0,
+                "syllables_per_minute": int(syllables / seconds * 60) if seconds else 0,
+            }
+
+        return {
+            "totals": totals_dict(*totals),
+            "months": [(month, totals_dict(*row)) for month, *row in monthly],
+            "hardest": words,
+        }
+
+
+class AudioEngine:
+    """
+    Mixer with a small buffer, effects pre-decoded in memory (in the background, after startup)
+    and music tracks streamed from their files when played; the time from key event to
+    Sound.play returning is measured
+    """
+
+    @staticmethod
+    def pre_init(buffer=None):
+        """
+        Configure the mixer, before pygame.init
+        :param buffer: samples of the mixer buffer, LEDORA_AUDIO_BUFFER or AUDIO_BUFFER by default
+        :return: buffer
+        """
+        buffer = buffer or int(environ.get("LEDORA_AUDIO_BUFFER", AUDIO_BUFFER))
+        pg.mixer.pre_init(AUDIO_FREQUENCY, -16, 2, buffer)
+        return buffer
+
+    def __init__(self, buffer=AUDIO_BUFFER):
+        self.buffer = buffer
+        self.effects = {}
+        self.ready = Event()
+        self.loader = None
+        self.music = None
+        self.latencies = []
+
+    def load(self):
+        """
+        Start decoding the effects in a worker thread
+        :return:
+        """
+        if self.loader is None:
+            self.loader = Thread(target=self.decode, daemon=True)
+            self.loader.start()
+
+    def decode(self):
+        try:
+            self.effects = {
+                name: pg.mixer.Sound(asset_item_file("sounds", file)) for name, file in EFFECT_SOUNDS.items()
+            }
+        finally:
+            self.ready.set()
+
+    def play(self, name, since=None):
+        """
+        Play an effect
+        :param name: positive, negative, pause or countdown
+        :param since: perf_counter time of the key event that triggered it
+        :return:
+        """
+        self.load()
+        self.ready.wait()
+        self.effects[name].play()
+        if since is not None:
+            self.latencies.append(perf_counter() - since)
+
+    def play_music(self, name, loops=0):
+        """
+        Stream a music track
+        :param name: main or results
+        :param loops: number of repetitions
+        :return:
+        """
+        if self.music != name:
+            pg.mixer.music.load(asset_item_file("sounds", MUSIC_TRACKS[name]), MUSIC_TRACKS[name])
+            self.music = name
+        pg.mixer.music.play(loops)
+
+    def stop_music(self):
+        pg.mixer.music.stop()
+
+
+class ClipboardTimeout(Exception):
+    pass
+
+
+class SceneChange(Exception):
+    """
+    Leave the current scene from a nested call: go to another scene, or quit if scene is None
+    """
+
+    def __init__(self, scene=None, **kwargs):
+        super().__init__(scene)
+        self.scene = scene
+        self.kwargs = kwargs
+
+
+class ClipboardPaste:
+    """
+    Pending clipboard read
+    """
+
+    def __init__(self):
+        self.done = Event()
+        self.text = None
+        self.error = None
+
+
+class ClipboardReader:
+    """
+    Clipboard access off the UI thread: the backend is detected in the background at startup
+    (and remembered across runs) and helper processes are killed when they do not answer in time
+    """
+
+    def __init__(self, timeout=CLIPBOARD_TIMEOUT):
+        self.timeout = timeout
+        self.backend = None
+        self.ready = Event()
+        Thread(target=self.detect, daemon=True).start()
+
+    @property
+    def session(self):
+        """
+        Key of the detected backend in the cache: platform and display server
+        :return:
+        """
+        display = "wayland" if environ.get("WAYLAND_DISPLAY") else "x11" if environ.get("DISPLAY") else "none"
+        return f"{sys.platform}-{display}"
+
+    def load(self):
+        try:
+            with open(cache_path("clipboard.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, backend):
+        backends = self.load()
+        if backend:
+            backends[self.session] = backend
+        else:
+            backends.pop(self.session, None)
+        try:
+            write_atomic(cache_path("clipboard.json"), json.dumps(backends).encode("utf-8"))
+        except OSError:
+            print("Clipboard backend not saved")
+
+    def detect(self):
+        """
+        Select the clipboard backend, probing the system only if none is cached
+        :return:
+        """
+        try:
+            from external import pyperclip
+
+            backend = self.load().get(self.session)
+            if backend:
+                pyperclip.set_clipboard(backend)
+            else:
+                pyperclip.copy, pyperclip.paste = pyperclip.determine_clipboard()
+                backend = CLIPBOARD_BACKENDS.get(getattr(pyperclip.paste, "__name__", None))
+                if backend:
+                    self.save(backend)
+            self.backend = backend
+        except Exception as e:
+            print(f"No clipboard backend: {e}")
+        finally:
+            self.ready.set()
+
+    def paste(self):
+        """
+        Read the clipboard, blocking up to the timeout
+        :return: text
+        """
+        if not self.ready.wait(self.timeout):
+            raise ClipboardTimeout("Clipboard backend detection timed out")
+        command = CLIPBOARD_COMMANDS.get(self.backend)
+        if command is None:
+            from external import pyperclip
+
+            return pyperclip.paste()
+        import subprocess
+
+        try:
+            result = subprocess.run(command, capture_output=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired as e:
+            raise ClipboardTimeout(f"{command[0]} did not answer in {self.timeout} s") from e
+        except OSError:
+            # the helper is gone, detect the backend again in the next run
+            self.save(None)
+            raise
+        return result.stdout.decode("utf-8")
+
+    def paste_async(self):
+        """
+        Read the clipboard in a worker thread
+        :return: ClipboardPaste
+        """
+        request = ClipboardPaste()
+
+        def run():
+            try:
+                request.text = self.paste()
+            except Exception as e:
+                request.error = e
+            request.done.set()
+
+        Thread(target=run, daemon=True).start()
+        return request
+
+
+def summarize(samples):
+    """
+    Summary statistics of a list of samples
+    :param samples:
+    :return: dict with count, mean, p50, p95 and max
+    """
+    if not samples:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean": fmean(ordered),
+        "p50": median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+    }
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry and counts hits and misses
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Returns the cached value (None if missing) and marks it as recently used
+        :param key:
+        :return:
+        """
+        try:
+            value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Store a value, evicting the least recently used ones above maxsize
+        :param key:
+        :param value:
+        :return:
+        """
+        if self.maxsize <= 0:
+            return
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+
+class FontRegistry:
+    """
+    Process-wide font registry: each face is read from disk once and the sized fonts
+    (pygame.font for the menus, pygame.freetype for the words) come from a bounded cache
+    """
+
+    def __init__(self, maxsize=FONT_CACHE_SIZE):
+        self.faces = {}
+        self.fonts = LRUCache(maxsize)
+        self.disk_reads = 0
+
+    def face(self, name):
+        """
+        Returns the content of a font file, read once
+        :param name: file name in assets/fonts
+        :return: bytes
+        """
+        data = self.faces.get(name)
+        if data is None:
+            data = read_resource(ASSETS_PATH, "fonts", name)
+            self.disk_reads += 1
+            self.faces[name] = data
+        return data
+
+    def get(self, size, name=MENU_FONT):
+        """
+        Returns a pygame.font.Font
+        :param size:
+        :param name: file name in assets/fonts, None for the pygame default font
+        :return:
+        """
+        key = ("font", name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pg.font.Font(None if name is None else BytesIO(self.face(name)), size)
+            self.fonts.put(key, font)
+        return font
+
+    def get_freetype(self, size, name=WORD_FONT):
+        """
+        Returns a pygame.freetype.Font with the origin at the baseline
+        :param size:
+        :param name: file name in assets/fonts
+        :return:
+        """
+        key = ("freetype", name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            import pygame.freetype
+
+            font = pygame.freetype.Font(BytesIO(self.face(name)), size)
+            font.origin = True
+            self.fonts.put(key, font)
+        return font
+
+    def stats(self):
+        """
+        Cache counters: after warm-up misses and disk reads should stop growing
+        :return:
+        """
+        return {
+            "hits": self.fonts.hits,
+            "misses": self.fonts.misses,
+            "disk_reads": self.disk_reads,
+            "cached": len(self.fonts),
+        }
+
+
+FONTS = FontRegistry()
+
+
 def get_font(size):
     """Returns Press-Start-2P in the desired size"""
-    return pg.font.Font(asset_item_path("fonts", "font.ttf"), size)
+    return FONTS.get(size)
+
+
+class GlyphAtlas:
+    """
+    Glyphs of the freetype fonts rendered once per face, size and color, and their metrics once per face and size,
+    to compose the words without laying out the text again
+    """
+
+    def __init__(self):
+        self.glyphs = {}
+        self.metrics = {}
+
+    def metric(self, font, letter):
+        """
+        Returns the metrics of a letter
+        :param font: pygame.freetype.Font with the origin at the baseline
+        :param letter:
+        :return: offset of the glyph left from the origin, of its top above the baseline, height and advance
+        """
+        key = (font.name, font.size, letter)
+        metric = self.metrics.get(key)
+        if metric is None:
+            rect = font.get_rect(letter)
+            metric = self.metrics[key] = (rect.x, rect.y, rect.height, font.get_metrics(letter)[0][4])
+        return metric
+
+    def layout(self, font, text):
+        """
+        Measure the text between two spaces, as font.get_rect(" " + text + " ") does
+        :param font:
+        :param text:
+        :return: size, baseline and advance of each letter
+        """
+        metrics = [self.metric(font, letter) for letter in text]
+        top = max(metric[1] for metric in metrics)
+        bottom = min(metric[1] - metric[2] for metric in metrics)
+        advances = [metric[3] for metric in metrics]
+        width = int(2 * self.metric(font, " ")[3] + sum(advances))
+        return (width, top - bottom), top, advances
+
+    def glyph(self, font, letter, color):
+        """
+        Returns the surface of a glyph, to blit at its offsets from the origin
+        :param font:
+        :param letter:
+        :param color:
+        :return:
+        """
+        key = (font.name, font.size, color, letter)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            glyph = self.glyphs[key] = font.render(letter, color)[0]
+        return glyph
+
+    def __len__(self):
+        return len(self.glyphs)
+
+
+GLYPHS = GlyphAtlas()
+
+
+class AssetCache:
+    """
+    Images loaded once and converted to the display pixel format, plus the variants derived
+    for the current resolution, rebuilt automatically when the resolution changes
+    """
+
+    def __init__(self, screen=None):
+        self.images = {}
+        self.size = None
+        self.variants = {}
+        # without a display mode, as with the texture renderer, the images are converted to the format of the screen
+        self.screen = screen
+
+    def image(self, name):
+        """
+        Returns an image of assets/imgs converted to the display format (the display mode must be set,
+        unless the screen of the cache is given)
+        :param name:
+        :return:
+        """
+        surface = self.images.get(name)
+        if surface is None:
+            surface = pg.image.load(asset_item_file("imgs", name), name)
+            alpha = surface.get_flags() & pg.SRCALPHA
+            if self.screen is not None:
+                surface = surface.convert(pg.Surface((1, 1), pg.SRCALPHA, 32) if alpha else self.screen)
+            else:
+                surface = surface.convert_alpha() if alpha else surface.convert()
+            self.images[name] = surface
+        return surface
+
+    def variant(self, name, size):
+        """
+        Returns a derived image for the screen size
+        :param name: background, background_gray, star or star_gray
+        :param size: screen size
+        :return:
+        """
+        if size != self.size:
+            self.rebuild(size)
+        surface = self.variants.get(name)
+        if surface is None:
+            surface = self.variants[name] = self.build(name)
+        return surface
+
+    def build(self, name):
+        if name == "background":
+            return pg.transform.scale(self.image(BACKGROUND_IMG), self.size)
+        if name == "star":
+            return pg.transform.scale(self.image(STAR_IMG), STAR_SIZE)
+        if name in ("background_gray", "star_gray"):
+            return pg.transform.grayscale(self.variant(name[: -len("_gray")], self.size))
+        raise KeyError(name)
+
+    def rebuild(self, size, names=("background",)):
+        """
+        Drop the derived images of another resolution and precompute some for the screen size
+        :param size:
+        :param names: variants to build right away, the others are built when first used
+        :return:
+        """
+        self.size = size
+        self.variants = {}
+        for name in names:
+            self.variant(name, size)
+
+
+class TextureRenderer:
+    """
+    Presentation through the SDL2 renderer, in a window of its own: the background, the words and the progress bar
+    are uploaded once as textures and composed by the GPU (or the software renderer), each present waits for the
+    vertical blank. The screens drawn on the screen surface, like the menus, are uploaded where they change.
+    """
+
+    def __init__(self, title, size, vsync=RENDERER_VSYNC):
+        from pygame._sdl2.video import Renderer, Texture, Window
+
+        self.Texture = Texture
+        self.window = Window(title, size=size)
+        self.renderer = Renderer(self.window, vsync=vsync)
+        self.screen = pg.Surface(size)
+        self.screen_texture = Texture(self.renderer, size, streaming=True)
+        # keyed like the rendered words, the backgrounds stay in as they are drawn on every frame
+        self.textures = LRUCache(WORD_CACHE_SIZE)
+
+    def texture(self, key, surface):
+        """
+        Returns the texture of a surface, uploading it if missing
+        :param key: key of the surface, None to upload it for this frame only
+        :param surface:
+        :return:
+        """
+        texture = self.textures.get(key) if key is not None else None
+        if texture is None:
+            texture = self.Texture.from_surface(self.renderer, surface)
+            if key is not None:
+                self.textures.put(key, texture)
+        return texture
+
+    def update(self, rects=None):
+        """
+        Upload the screen surface, or these rects of it, and present it
+        :param rects: None for the whole screen
+        :return:
+        """
+        if rects is None:
+            self.screen_texture.update(self.screen)
+        elif not rects:
+            return
+        else:
+            bounds = self.screen.get_rect()
+            for rect in rects:
+                rect = bounds.clip(rect)
+                if rect:
+                    self.screen_texture.update(self.screen.subsurface(rect), area=rect)
+        self.renderer.clear()
+        self.screen_texture.draw()
+        self.renderer.present()
+
+    def present(self, layers, fills=()):
+        """
+        Compose a frame of textures and present it
+        :param layers: (key, surface, destination) from the bottom up, see texture
+        :param fills: (rect, color) drawn over the layers
+        :return:
+        """
+        renderer = self.renderer
+        renderer.draw_color = (0, 0, 0, 255)
+        renderer.clear()
+        for key, surface, dest in layers:
+            texture = self.texture(key, surface)
+            texture.draw(dstrect=(dest[0], dest[1], texture.width, texture.height))
+        for rect, color in fills:
+            renderer.draw_color = pg.Color(color)
+            renderer.fill_rect(rect)
+        renderer.present()
 
 
 class Button:
@@ -76,11 +1907,15 @@ class Button:
         self.font = font
         self.base_color, self.hovering_color = base_color, hovering_color
         self.text_input = text_input
-        self.text = self.font.render(self.text_input, True, self.base_color)
+        self.base_text = self.font.render(self.text_input, True, self.base_color)
+        self.hovering_text = self.font.render(self.text_input, True, self.hovering_color)
+        self.text = self.base_text
+        self.hovering = False
         if self.image is None:
             self.image = self.text
         self.rect = self.image.get_rect(center=(self.x_pos, self.y_pos))
         self.text_rect = self.text.get_rect(center=(self.x_pos, self.y_pos))
+        self.dirty_rect = self.rect.union(self.text_rect)
 
     def update(self, screen):
         if self.image is not None:
@@ -88,49 +1923,867 @@ class Button:
         screen.blit(self.text, self.text_rect)
 
     def checkForInput(self, position):
-        if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(
-            self.rect.top, self.rect.bottom
-        ):
-            return True
-        return False
+        return self.rect.collidepoint(position)
 
     def changeColor(self, position):
-        if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(
-            self.rect.top, self.rect.bottom
-        ):
-            self.text = self.font.render(self.text_input, True, self.hovering_color)
+        """
+        Switch between the pre-rendered base and hovering texts
+        :param position: mouse position
+        :return: True if the hovering state changed
+        """
+        hovering = self.checkForInput(position)
+        if hovering == self.hovering:
+            return False
+        self.hovering = hovering
+        self.text = self.hovering_text if hovering else self.base_text
+        return True
+
+
+class ButtonGroup:
+    """
+    Retained-mode set of buttons: only the buttons whose hovering state changed are redrawn
+    and only their rects are sent to the display update
+    """
+
+    def __init__(self, buttons, background, background_rect):
+        self.buttons = list(buttons)
+        self.background = background
+        self.background_rect = background_rect
+
+    def draw(self, screen, position):
+        """
+        Draw all the buttons
+        :param screen:
+        :param position: mouse position
+        :return: rects to update
+        """
+        for btn in self.buttons:
+            btn.changeColor(position)
+        return [self.redraw(screen, btn) for btn in self.buttons]
+
+    def update(self, screen, position):
+        """
+        Redraw the buttons whose hovering state changed
+        :param screen:
+        :param position: mouse position
+        :return: rects to update
+        """
+        return [self.redraw(screen, btn) for btn in self.buttons if btn.changeColor(position)]
+
+    def redraw(self, screen, btn):
+        rect = btn.dirty_rect
+        screen.blit(self.background, rect, area=rect.move(-self.background_rect.x, -self.background_rect.y))
+        btn.update(screen)
+        return rect
+
+
+class SectionProfiler:
+    """
+    Timers of the hot sections and of the frames, shown in an overlay toggled with F3 and exported with F4;
+    the sections are wrapped only while profiling, otherwise the methods are the original ones
+    """
+
+    def __init__(self, window=PROFILE_WINDOW, top=PROFILE_TOP):
+        self.enabled = False
+        self.top = top
+        self.targets = []
+        self.patched = []
+        self.frames = deque(maxlen=window)
+        self.window = window
+        self.samples = {}
+        self.totals = {}
+        self.surface = None
+        self.rendered_at = 0
+
+    def watch(self, owner, *names):
+        """
+        Sections to time while profiling
+        :param owner: instance or class
+        :param names: names of its methods
+        :return:
+        """
+        self.targets.append((owner, names))
+        if self.enabled:
+            self.patch(owner, names)
+
+    def patch(self, owner, names):
+        for name in names:
+            # a method of a class is put back as it was, one of an instance is just removed
+            own = name in vars(owner)
+            self.patched.append((owner, name, vars(owner)[name] if own else None, own))
+            timed = self.timed(name, getattr(owner, name))
+            setattr(owner, name, staticmethod(timed) if isinstance(vars(owner).get(name), staticmethod) else timed)
+
+    def timed(self, name, func):
+        add = self.add
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(name, perf_counter() - start)
+
+        return timed
+
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            for owner, names in self.targets:
+                self.patch(owner, names)
+
+    def disable(self):
+        if self.enabled:
+            self.enabled = False
+            for owner, name, original, own in reversed(self.patched):
+                if own:
+                    setattr(owner, name, original)
+                else:
+                    delattr(owner, name)
+            self.patched = []
+
+    def add(self, name, duration):
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = deque(maxlen=self.window)
+            self.totals[name] = [0, 0.0]
+        samples.append(duration)
+        totals = self.totals[name]
+        totals[0] += 1
+        totals[1] += duration
+
+    def frame(self, duration):
+        """
+        Time spent on a frame, from the end of the wait for it to the next wait
+        :param duration:
+        :return:
+        """
+        self.frames.append(duration)
+
+    def histogram(self):
+        """
+        Returns the count of the recent frames in each bin of PROFILE_BINS, and above the last one
+        :return:
+        """
+        counts = [0] * (len(PROFILE_BINS) + 1)
+        for duration in self.frames:
+            ms = duration * 1000
+            counts[next((i for i, bound in enumerate(PROFILE_BINS) if ms < bound), len(PROFILE_BINS))] += 1
+        return counts
+
+    def stats(self):
+        """
+        Returns the frame times, their histogram and the sections, the slowest first
+        :return: dict, in seconds
+        """
+        sections = {}
+        for name, samples in self.samples.items():
+            count, total = self.totals[name]
+            sections[name] = {**summarize(list(samples)), "calls": count, "total": total}
+        return {
+            "frames": summarize(list(self.frames)),
+            "histogram": dict(zip([f"<{bound} ms" for bound in PROFILE_BINS] + ["more"], self.histogram())),
+            "sections": dict(sorted(sections.items(), key=lambda item: item[1]["max"], reverse=True)),
+        }
+
+    def export(self, file):
+        """
+        Write the stats, with the versions, to a JSON file to attach to a bug report
+        :param file:
+        :return:
+        """
+        data = {
+            "app": f"{APP_NAME} v{APP_VERSION}",
+            "platform": sys.platform,
+            "python": sys.version.split()[0],
+            "pygame": pg.version.ver,
+            "sdl": ".".join(map(str, pg.get_sdl_version())),
+            **self.stats(),
+        }
+        write_atomic(file, json.dumps(data, indent=2).encode("utf-8"))
+        return file
+
+    def handle(self, event):
+        """
+        Handle the keys of the profiler
+        :param event:
+        :return: True if the event was used
+        """
+        if event.type != pg.KEYDOWN or event.key not in (PROFILE_KEY, PROFILE_EXPORT_KEY):
+            return False
+        if event.key == PROFILE_EXPORT_KEY:
+            file = data_path("profiles", f"profile-{strftime('%Y%m%d-%H%M%S')}.json")
+            print(f"Profile exported to {self.export(file)}")
+        elif self.enabled:
+            self.disable()
+            if self.surface is not None and pg.display.get_surface() is not None:
+                # the overlay is never left on the screen surface, updating its area erases it
+                pg.display.update(self.surface.get_rect())
         else:
-            self.text = self.font.render(self.text_input, True, self.base_color)
+            self.enable()
+        return True
+
+    def render(self):
+        """
+        Returns the overlay, rendered again at most every PROFILE_REFRESH seconds
+        :return:
+        """
+        now = perf_counter()
+        if self.surface is not None and now - self.rendered_at < PROFILE_REFRESH:
+            return self.surface
+        self.rendered_at = now
 
+        font = get_font(10)
+        frames = summarize(list(self.frames))
+        lines = [
+            f"frame {self.frames[-1] * 1000 if self.frames else 0:.1f} ms",
+            f"p50 {frames['p50'] * 1000:.1f} p95 {frames['p95'] * 1000:.1f} max {frames['max'] * 1000:.1f}",
+        ]
+        lines.append(f"{'ms':<16}    max   mean")
+        sections = self.stats()["sections"]
+        for name, section in list(sections.items())[: self.top]:
+            lines.append(f"{name[:16]:<16} {section['max'] * 1000:6.1f} {section['mean'] * 1000:6.1f}")
+
+        counts = self.histogram()
+        width, bar_height = 340, 40
+        surface = pg.Surface((width, 16 * len(lines) + bar_height + 28), pg.SRCALPHA)
+        surface.fill((0, 0, 0, 180))
+        for i, line in enumerate(lines):
+            surface.blit(font.render(line, True, FONT_COLOR_B), (6, 6 + 16 * i))
+        bar_width = (width - 12) // len(counts)
+        top = 16 * len(lines) + 10
+        for i, count in enumerate(counts):
+            height = int(bar_height * count / max(1, max(counts)))
+            color = FONT_COLOR_A if i < PROFILE_BINS.index(16) + 1 else "orangered"
+            pg.draw.rect(surface, color, (6 + i * bar_width, top + bar_height - height, bar_width - 2, height))
+        self.surface = surface
+        return surface
+
+    def draw(self, screen):
+        """
+        Draw the overlay on the screen
+        :param screen:
+        :return: what was under it, to restore after the display update
+        """
+        overlay = self.render()
+        under = screen.subsurface(overlay.get_rect().clip(screen.get_rect())).copy()
+        screen.blit(overlay, (0, 0))
+        return under
+
+    def present(self):
+        """
+        Show the overlay between the flips of the scene, the screen surface is left as it was
+        :return:
+        """
+        screen = pg.display.get_surface()
+        if screen is not None:
+            under = self.draw(screen)
+            pg.display.update(under.get_rect())
+            screen.blit(under, (0, 0))
+
+
+PROFILER = SectionProfiler()
+PROFILER.watch(Button, "changeColor")
+
+
+class FrameScheduler:
+    """
+    Frame-paced event pump: sleeps until the next input event or deadline instead of spinning,
+    never runs faster than the frame rate and keeps track of the CPU time spent in the session
+    """
+
+    def __init__(self, frame_rate=FRAME_RATE):
+        self.frame_period = 1 / frame_rate
+        self.frames = 0
+        self.cpu_start = process_time()
+        self.wall_start = self.last_frame = self.woken_at = perf_counter()
+
+    def wait(self, deadline=None):
+        """
+        Wait for the next frame and then until an event arrives or the deadline is reached
+        :param deadline: perf_counter time of the next deadline, None to wait for events only
+        :return: list of events
+        """
+        busy = perf_counter() - self.woken_at
+        events = self.pump(deadline)
+        self.woken_at = perf_counter()
+        if PROFILER.enabled:
+            PROFILER.frame(busy)
+            PROFILER.present()
+        return [event for event in events if not PROFILER.handle(event)]
+
+    def pump(self, deadline=None):
+        next_frame = self.last_frame + self.frame_period
+        if deadline is not None:
+            next_frame = min(next_frame, deadline)
+        delay = next_frame - perf_counter()
+        if delay > 0:
+            sleep(delay)
+        self.last_frame = perf_counter()
+        self.frames += 1
+
+        events = pg.event.get()
+        if events or (deadline is not None and deadline <= self.last_frame):
+            return events
+        if deadline is None:
+            return [pg.event.wait()]
+
+        # SDL waits in whole milliseconds, the last one is slept with the high resolution timer
+        ms = int((deadline - perf_counter()) * 1000) - 1
+        if ms > 0:
+            event = pg.event.wait(ms)
+            if event.type != pg.NOEVENT:
+                return [event] + pg.event.get()
+        delay = deadline - perf_counter()
+        if delay > 0:
+            sleep(delay)
+        return pg.event.get()
+
+    def report(self):
+        """
+        Returns the frames, wall time and CPU time since the scheduler was created
+        :return: dict
+        """
+        wall_time = perf_counter() - self.wall_start
+        cpu_time = process_time() - self.cpu_start
+        return {
+            "frames": self.frames,
+            "wall_time": wall_time,
+            "cpu_time": cpu_time,
+            "cpu_usage": cpu_time / wall_time if wall_time else 0.0,
+        }
+
+
+class ExposureTimer:
+    """
+    Monotonic word exposure timer: schedules the hide of each word on a frame boundary
+    and measures how long each word was really on screen, from flip to flip
+    """
+
+    def __init__(self, frame_rate=FRAME_RATE, clock=perf_counter):
+        self.frame_period = 1 / frame_rate
+        self.clock = clock
+        self.word_index = None
+        self.target = 0
+        self.shown_at = None
+        self.deadline = None
+        self.exposures = []
+
+    def show(self, word_index, target, shown_at):
+        """
+        Start the exposure of a word
+        :param word_index:
+        :param target: expected exposure in seconds
+        :param shown_at: time of the flip that showed the word
+        :return:
+        """
+        self.interrupt(shown_at)
+        frames = max(1, round(target / self.frame_period))
+        self.word_index = word_index
+        self.target = target
+        self.shown_at = shown_at
+        self.deadline = shown_at + frames * self.frame_period
+
+    def hide(self, hidden_at):
+        """
+        Finish the exposure of the word
+        :param hidden_at: time of the flip that hid the word
+        :return:
+        """
+        if self.shown_at is not None:
+            self.exposures.append((self.word_index, self.target, self.shown_at, hidden_at))
+        self.cancel()
+
+    def interrupt(self, at):
+        """
+        Finish the exposure of the word before its hide, when it is replaced or paused: measured, but left out
+        of the accuracy of the hides
+        :param at: time of the flip that replaced the word
+        :return:
+        """
+        if self.shown_at is not None:
+            self.exposures.append((self.word_index, None, self.shown_at, at))
+        self.cancel()
+
+    def cancel(self):
+        """
+        Drop the current exposure without measuring it
+        :return:
+        """
+        self.shown_at = None
+        self.deadline = None
+
+    @property
+    def time_left(self):
+        """
+        Seconds left before the word must be hidden
+        :return:
+        """
+        if self.deadline is None:
+            return 0
+        return self.deadline - self.clock()
+
+    def stats(self):
+        """
+        Statistics of how far the measured exposures missed their targets
+        :return: dict with the errors in seconds
+        """
+        errors = [
+            hidden_at - shown_at - target for _, target, shown_at, hidden_at in self.exposures if target is not None
+        ]
+        if not errors:
+            return {"count": 0, "mean_error": 0.0, "stdev_error": 0.0, "min_error": 0.0, "max_error": 0.0}
+        return {
+            "count": len(errors),
+            "mean_error": fmean(errors),
+            "stdev_error": pstdev(errors),
+            "min_error": min(errors),
+            "max_error": max(errors),
+        }
+
+
+class SessionStats:
+    """
+    Statistics of a play session updated in O(1) on each word shown, return and pause; the values per word
+    are kept in arrays, so the results, the live HUD and the curves need no pass over the words
+    """
+
+    def __init__(self, started_at=0.0):
+        self.started_at = started_at
+        self.ended_at = None
+        self.word_index = -1
+        self.first_flip = False
+        self.fails = 0
+        self.pauses = 0
+        # per word, in the order of their first flip: time of the flip, returns to it and pauses on it
+        self.shown_at = array("d")
+        self.retries = array("H")
+        self.word_pauses = array("H")
+        # syllables of the words before each index, the syllables read are a lookup
+        self.syllables_before = array("I", [0])
+
+    def start(self, started_at):
+        self.started_at = started_at
+        self.ended_at = None
+
+    def show(self, word_index, syllables):
+        """
+        The next word is drawn, the time of its flip is given to flipped
+        :param word_index:
+        :param syllables:
+        :return:
+        """
+        self.word_index = word_index
+        if word_index == len(self.shown_at):
+            self.shown_at.append(0.0)
+            self.retries.append(0)
+            self.word_pauses.append(0)
+            self.syllables_before.append(self.syllables_before[-1] + syllables)
+            self.first_flip = True
+
+    def flipped(self, shown_at):
+        """
+        The word drawn by show was flipped
+        :param shown_at:
+        :return:
+        """
+        if self.first_flip:
+            self.shown_at[-1] = shown_at
+            self.first_flip = False
+
+    def retry(self, word_index):
+        """
+        The word was shown again after a wrong reading
+        :param word_index:
+        :return:
+        """
+        self.word_index = word_index
+        self.fails += 1
+        if 0 <= word_index < len(self.retries):
+            self.retries[word_index] += 1
+
+    def pause(self, word_index):
+        self.pauses += 1
+        if 0 <= word_index < len(self.word_pauses):
+            self.word_pauses[word_index] += 1
+
+    def end(self, ended_at):
+        if self.ended_at is None:
+            self.ended_at = ended_at
+
+    @property
+    def words(self):
+        return self.word_index + 1
+
+    @property
+    def syllables(self):
+        return self.syllables_before[self.word_index + 1]
+
+    def elapsed(self, now):
+        """
+        Seconds since the start, until the end of the session if it has ended
+        :param now:
+        :return:
+        """
+        return (self.ended_at if self.ended_at is not None else now) - self.started_at
+
+    def paces(self, now):
+        """
+        Returns the words and syllables per minute
+        :param now:
+        :return:
+        """
+        elapsed = self.elapsed(now)
+        if elapsed <= 0:
+            return 0, 0
+        return int(self.words / elapsed * 60), int(self.syllables / elapsed * 60)
+
+    def reading_times(self, now):
+        """
+        Seconds from the first flip of each word to the first flip of the next one, or the end
+        :param now:
+        :return: array
+        """
+        until = self.shown_at[1:]
+        until.append(self.ended_at if self.ended_at is not None else now)
+        return array("d", map(float.__sub__, until, self.shown_at))
+
+    def pace_curve(self):
+        """
+        Words per minute since the start at the first flip of each word
+        :return: array
+        """
+        started_at = self.started_at
+        return array(
+            "d", (60 * (i + 1) / (at - started_at) if at > started_at else 0.0 for i, at in enumerate(self.shown_at))
+        )
+
+
+def run_display(conn, display=None, headless=False):
+    """
+    Main of the display process of a split session: presents the words pre-rendered by the operator process,
+    flipping each frame as soon as it arrives and replying with the time of the flip
+    :param conn: end of the pipe to the operator process
+    :param display: index of the screen of the child, the last one by default
+    :param headless: SDL dummy video driver, for the tests
+    :return:
+    """
+    if headless:
+        environ["SDL_VIDEODRIVER"] = "dummy"
+    pg.display.init()
+    sizes = pg.display.get_desktop_sizes()
+    index = len(sizes) - 1 if display is None else min(display, len(sizes) - 1)
+    screen = pg.display.set_mode(sizes[index], display=index)
+    pg.display.set_caption(APP_NAME)
+    width, height = size = screen.get_size()
+    center = screen.get_rect().center
+
+    assets = AssetCache()
+    backgrounds = (assets.variant("background", size), assets.variant("background_gray", size))
+    background_rect = backgrounds[0].get_rect(center=center)
+    # same size and same order of use as the mirror of the operator process, so the same words are evicted
+    slots = LRUCache(WORD_CACHE_SIZE)
+    screen.blit(backgrounds[0], background_rect)
+    pg.display.flip()
+    conn.send_bytes(bytes((DISPLAY_HELLO,)) + DISPLAY_HELLO_BODY.pack(width, height))
+
+    while True:
+        # the window is kept responsive while idle, a message is handled as soon as it arrives
+        try:
+            if not conn.poll(0.1):
+                pg.event.pump()
+                continue
+            message = conn.recv_bytes()
+        except (EOFError, ConnectionError):
+            # the operator process is gone
+            message = bytes((DISPLAY_QUIT,))
+        kind = message[0]
+        if kind == DISPLAY_FRAME:
+            slot, gray, progress, color, since = DISPLAY_FRAME_BODY.unpack_from(message, 1)
+            screen.blit(backgrounds[gray], background_rect)
+            surface = slots.get(slot) if slot != DISPLAY_NO_SLOT else None
+            if surface is not None:
+                screen.blit(surface, surface.get_rect(center=center))
+            if progress >= 0:
+                pg.draw.rect(screen, PROGRESS_COLORS[color], (0, height - 125, width * progress, 20))
+            pg.display.flip()
+            flipped_at = perf_counter()
+            try:
+                conn.send_bytes(bytes((DISPLAY_FLIPPED,)) + DISPLAY_FLIPPED_BODY.pack(since, flipped_at))
+            except ConnectionError:
+                break
+        elif kind == DISPLAY_PRELOAD:
+            slot, surface_width, surface_height = DISPLAY_PRELOAD_BODY.unpack_from(message, 1)
+            pixels = message[1 + DISPLAY_PRELOAD_BODY.size :]
+            slots.put(slot, pg.image.frombuffer(pixels, (surface_width, surface_height), "RGBA").convert_alpha())
+        elif kind == DISPLAY_QUIT:
+            break
+    conn.close()
+    pg.quit()
+
+
+class RemoteDisplay:
+    """
+    Operator end of a split session: starts the display process, sends it the pre-rendered words and the frames
+    to present, and measures from its replies the latency from the key to the flip on the child screen
+    and how long the words stayed there
+    """
+
+    def __init__(self, display=None, headless=False):
+        from multiprocessing import get_context
+
+        context = get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=run_display, args=(child_conn, display, headless), daemon=True)
+        self.process.start()
+        child_conn.close()
+        message = self.conn.recv_bytes()
+        self.width, self.height = DISPLAY_HELLO_BODY.unpack_from(message, 1)
+        # key -> slot of the words the display process has
+        self.slots = LRUCache(WORD_CACHE_SIZE)
+        self.next_slot = 0
+        # whether each frame waiting for its reply shows a timed word
+        self.sent = deque()
+        self.shown_at = None
+        self.latencies = []
+        self.exposures = []
+
+    def preload(self, key, surface):
+        """
+        Send a rendered word to the display process, unless it has it already
+        :param key: key of the word in the cache of the words
+        :param surface:
+        :return:
+        """
+        if key in self.slots:
+            return
+        slot = self.next_slot
+        self.next_slot += 1
+        header = DISPLAY_PRELOAD_BODY.pack(slot, *surface.get_size())
+        self.conn.send_bytes(bytes((DISPLAY_PRELOAD,)) + header + pg.image.tobytes(surface, "RGBA"))
+        self.slots.put(key, slot)
+
+    def frame(self, key=None, surface=None, gray=False, progress=-1.0, color=0, since=nan, timed=False):
+        """
+        Send a frame to present
+        :param key: key of the word, None for a blank frame
+        :param surface: the rendered word, sent first if the display process does not have it
+        :param gray: gray background
+        :param progress: fraction of the progress bar, negative without progress bar
+        :param color: index of the color of the progress bar in PROGRESS_COLORS
+        :param since: time of the key that changed the frame, NaN if not changed by a key
+        :param timed: whether the word is hidden on a deadline, to measure its exposure
+        :return:
+        """
+        slot = DISPLAY_NO_SLOT
+        if key is not None:
+            self.preload(key, surface)
+            slot = self.slots.get(key)
+        self.conn.send_bytes(bytes((DISPLAY_FRAME,)) + DISPLAY_FRAME_BODY.pack(slot, gray, progress, color, since))
+        self.sent.append(timed)
+
+    def poll(self, timeout=0.0):
+        """
+        Handle the replies of the display process
+        :param timeout: seconds to wait for the first one
+        :return:
+        """
+        while self.sent and self.conn.poll(timeout):
+            timeout = 0
+            since, flipped_at = DISPLAY_FLIPPED_BODY.unpack_from(self.conn.recv_bytes(), 1)
+            if not isnan(since):
+                self.latencies.append(flipped_at - since)
+            if self.shown_at is not None:
+                self.exposures.append(flipped_at - self.shown_at)
+            self.shown_at = flipped_at if self.sent.popleft() else None
+
+    def close(self):
+        if self.conn.closed:
+            return
+        if self.process.is_alive():
+            self.conn.send_bytes(bytes((DISPLAY_QUIT,)))
+            self.process.join(2)
+        self.conn.close()
 
-class Ledora:
+
+class SoakMonitor:
+    """
+    Samples of the process during a soak run (traced Python heap, objects tracked by the collector, live pygame
+    surfaces and fonts, open files) and their growth per cycle once the caches are warm
+    """
+
+    METRICS = ("heap", "objects", "surfaces", "fonts", "files")
 
     def __init__(self):
+        self.samples = []
+        self.tracing = False
+
+    def start(self):
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.tracing = True
+
+    def stop(self):
+        import tracemalloc
+
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    @staticmethod
+    def live_objects():
+        """
+        Count the live surfaces and fonts, which the collector does not track, among the referents of those it does
+        :return: surfaces and fonts
+        """
+        font_types = (pg.font.Font,)
+        if "pygame.freetype" in sys.modules:
+            font_types += (sys.modules["pygame.freetype"].Font,)
+        surfaces, fonts, containers = set(), set(), set()
+        pending = gc.get_objects()
+        while pending:
+            referents, pending = gc.get_referents(*pending), []
+            for ref in referents:
+                if isinstance(ref, pg.Surface):
+                    surfaces.add(id(ref))
+                elif isinstance(ref, font_types):
+                    fonts.add(id(ref))
+                elif isinstance(ref, (dict, list, tuple)) and not gc.is_tracked(ref) and id(ref) not in containers:
+                    # a container of untracked objects only, like a dict of surfaces, is not tracked either
+                    containers.add(id(ref))
+                    pending.append(ref)
+        return len(surfaces), len(fonts)
+
+    @staticmethod
+    def open_files():
+        """
+        Returns the number of open file descriptors, -1 where /proc is not available
+        :return:
+        """
+        try:
+            return len(listdir("/proc/self/fd"))
+        except OSError:
+            return -1
+
+    def sample(self, cycle):
+        import tracemalloc
+
+        gc.collect()
+        surfaces, fonts = self.live_objects()
+        self.samples.append(
+            {
+                "cycle": cycle,
+                "heap": tracemalloc.get_traced_memory()[0],
+                "objects": len(gc.get_objects()),
+                "surfaces": surfaces,
+                "fonts": fonts,
+                "files": self.open_files(),
+            }
+        )
+
+    def report(self, thresholds=SOAK_THRESHOLDS, warmup=SOAK_WARMUP):
+        """
+        Growth per cycle of each metric, the least squares slope over the samples after the warm-up
+        :param thresholds: maximum growth per cycle of each metric
+        :param warmup: cycles left out, while the caches fill
+        :return: dict with the samples, the growth and the metrics whose growth is above its threshold
+        """
+        samples = [sample for sample in self.samples if sample["cycle"] >= warmup]
+        growth = {}
+        if len(samples) > 1:
+            cycles = [sample["cycle"] for sample in samples]
+            mean_cycle = fmean(cycles)
+            spread = sum((cycle - mean_cycle) ** 2 for cycle in cycles)
+            for metric in self.METRICS:
+                values = [sample[metric] for sample in samples]
+                mean_value = fmean(values)
+                growth[metric] = (
+                    sum((cycle - mean_cycle) * (value - mean_value) for cycle, value in zip(cycles, values)) / spread
+                )
+        return {
+            "samples": self.samples,
+            "growth": growth,
+            "failed": sorted(metric for metric, slope in growth.items() if slope > thresholds[metric]),
+        }
+
+
+class Ledora:
+
+    def __init__(self, profiler=None, record_dir=None, child=""):
 
+        self.profiler = profiler
+        self.record_dir = record_dir
+        self.child = child
+        self.hud = False
+        self.session_log = None
+        # perf_counter, or the virtual clock of a replayed session
+        self.clock = perf_counter
         self.pg = pg
+        audio_buffer = AudioEngine.pre_init()
         self.pg.init()
-        self.pg.display.set_icon(pg.image.load(asset_item_path("imgs", LOGO_IMG)))
+        self.mark_startup("pygame init")
+        self.pg.display.set_icon(pg.image.load(asset_item_file("imgs", LOGO_IMG), LOGO_IMG))
         self.pg.display.set_caption(self.name)
 
         self.width, self.height = self.get_screen_size()
         self.height_usable = self.height - 100
+        self.renderer = None
         self.screen = self.get_screen()
+        self.mark_startup("display")
+        # while composing, the drawing methods of the play scene describe the frame instead of drawing it
+        self.compose_frames = self.renderer is not None
+        self.composing = False
+        self.frame = {}
 
-        self.background = pg.transform.scale(
-            self.pg.image.load(asset_item_path("imgs", BACKGROUND_IMG)), (self.width, self.height)
-        )
-        self.background_rect = self.background.get_rect(center=(self.width / 2, self.height / 2))
+        self.assets = AssetCache(self.screen if self.renderer is not None else None)
+        self.assets.rebuild(self.screen.get_size())
+        self.mark_startup("background")
 
+        self.word_cache = LRUCache(WORD_CACHE_SIZE)
+        self.word_rendering = environ.get("LEDORA_WORD_RENDERING", WORD_RENDERING)
+        self.clipboard = ClipboardReader()
+        self.telemetry = TelemetryStore(data_path("telemetry.sqlite3"))
         self.set_states()
         self.initialize_words()
 
-        # Instantiate mixer
-        self.positive_sound = pygame.mixer.Sound(asset_item_path("sounds", POSITIVE_SOUND))
-        self.negative_sound = pygame.mixer.Sound(asset_item_path("sounds", NEGATIVE_SOUND))
-        self.pause_sound = pygame.mixer.Sound(asset_item_path("sounds", PAUSE_SOUND))
-        self.countdown_sound = pygame.mixer.Sound(asset_item_path("sounds", COUNTDOWN_SOUND))
-        self.results_sound = pygame.mixer.Sound(asset_item_path("sounds", RESULTS_SOUND))
-        self.main_sound = pygame.mixer.Sound(asset_item_path("sounds", MAIN_SOUND))
+        # Instantiate mixer, the effects are decoded after the menu is shown
+        self.audio = AudioEngine(audio_buffer)
+
+    def mark_startup(self, phase):
+        """
+        End a phase of the startup profile, if profiling
+        :param phase:
+        :return:
+        """
+        if self.profiler is not None:
+            self.profiler.mark(phase)
+
+    def warm_up(self):
+        """
+        Load in the background what the menu does not need: sound effects and the font of the words,
+        then the gray variants of the images
+        :return:
+        """
+        if self.audio.loader is not None:
+            return
+        self.audio.load()
+        Thread(target=FONTS.face, args=(WORD_FONT,), daemon=True).start()
+        for name in ("background_gray", "star", "star_gray"):
+            self.assets.variant(name, self.screen.get_size())
+
+    @property
+    def background(self):
+        """
+        Returns the background scaled to the screen
+        :return:
+        """
+        return self.assets.variant("background", self.screen.get_size())
+
+    @property
+    def background_rect(self):
+        return self.background.get_rect(center=self.screen.get_rect().center)
 
     @property
     def name(self):
@@ -151,9 +2804,17 @@ class Ledora:
 
     def get_screen(self):
         """
-        Returns the screen
+        Returns the screen, the surface the texture renderer uploads if LEDORA_RENDERER is texture
         :return:
         """
+        if environ.get("LEDORA_RENDERER", RENDERER) == "texture":
+            try:
+                self.renderer = TextureRenderer(self.name, (self.width, self.height))
+            except (ImportError, RuntimeError) as e:
+                print(f"Texture renderer not available ({e}), drawing on the display surface")
+            else:
+                self.renderer.window.set_icon(pg.image.load(asset_item_file("imgs", LOGO_IMG), LOGO_IMG))
+                return self.renderer.screen
         screen = self.pg.display.set_mode((self.width, self.height))
         self.pg.display.update()
         return screen
@@ -164,11 +2825,12 @@ class Ledora:
         :return:
         """
         self.word_index = -1
-        self.count_fails = 0
         self.start_time = None
-        self.forward_datetime = datetime.now()
         self.duration = 0
-        self.expected_duration = 0
+        self.exposure = ExposureTimer(clock=self.clock)
+        self.stats = SessionStats()
+        self.key_latencies = {True: [], False: []}
+        self.pressed_at = None
 
     def initialize_words(self):
         """
@@ -178,6 +2840,7 @@ class Ledora:
         self.words = []
         self.positions = []
         self.n = 0
+        self.stream = None
 
     @property
     def check_word_still_shown(self):
@@ -186,96 +2849,209 @@ class Ledora:
         :return:
         """
 
-        return (datetime.now() - self.forward_datetime).total_seconds() < self.expected_duration
+        return self.word_time_left > 0
+
+    @property
+    def word_time_left(self):
+        """
+        Seconds left before the word must be hidden
+        :return:
+        """
+
+        return self.exposure.time_left
 
-    def cls(self, gray=False):
+    def cls(self, gray=False, flip=True):
         """
         Clear the screen
         :param gray:
+        :param flip:
         :return:
         """
-        if gray:
-            self.screen.blit(pg.transform.grayscale(self.background), self.background_rect)
+        if self.composing:
+            self.frame = {"key": None, "surface": None, "word": False, "gray": gray, "progress": None, "hud": None}
+        elif gray:
+            self.screen.blit(self.assets.variant("background_gray", self.screen.get_size()), self.background_rect)
         else:
             self.screen.blit(self.background, self.background_rect)
-        self.display_flip()
+        if flip:
+            self.display_flip()
+
+    def show_word(self):
+        """
+        Flip the word drawn on the screen and start its exposure
+        :return:
+        """
+        text = self.words[self.word_index]
+        shown_at = self.display_flip()
+        self.exposure.show(self.word_index, max(WORD_DURATION, len(text) * WORD_DURATION_PER_CAR), shown_at)
+        self.wait = True
+        self.duration = shown_at - self.start_time
+        # the blank frame is drawn right away so that hiding the word on its deadline is a single flip
+        self.cls(flip=False)
 
     def hide_word(self):
         """
         Hide the word
         :return:
         """
-        self.cls()
+        hidden_at = self.display_flip()
+        self.exposure.hide(hidden_at)
         self.wait = False
-        self.duration = (datetime.now() - self.start_time).total_seconds()
+        self.duration = hidden_at - self.start_time
 
     def next_word(self, play_sound=True):
         """
         Next word
-        :return:
+        :return: False if the word stream ended while the last word was on screen, the word is left in place
         """
         if play_sound:
-            self.positive_sound.play()
-        self.lock = True
-        self.cls()
+            self.audio.play("positive", since=self.pressed_at)
+        while self.stream is not None and self.word_index + 1 >= len(self.words):
+            self.fill_words(block=True)
+        if self.word_index + 1 >= len(self.words):
+            return False
+        self.cls(flip=False)
         self.word_index += 1
         text = self.words[self.word_index]
         position = self.positions[self.word_index]
-        self.write_text_multicolor(text, position)
-        self.forward_datetime = datetime.now()
-        self.wait = True
-        self.expected_duration = max(WORD_DURATION, len(text) * WORD_DURATION_PER_CAR)
-        self.duration = (datetime.now() - self.start_time).total_seconds()
+        self.write_text_multicolor(text, position, flip=False)
         self.draw_progress()
-        self.display_flip()
-        self.lock = False
+        self.stats.show(self.word_index, len(position) + 1)
+        self.draw_hud()
+        self.show_word()
+        self.stats.flipped(self.exposure.shown_at)
+        return True
 
     def pause_word(self):
         """
         Pause the word
         :return:
         """
-        self.pause_sound.play()
-        self.lock = True
-        self.cls(gray=True)
+        self.audio.play("pause", since=self.pressed_at)
+        self.cls(gray=True, flip=False)
         text = self.words[self.word_index]
         position = self.positions[self.word_index]
-        self.write_text_multicolor(text, position)
+        self.write_text_multicolor(text, position, flip=False)
+        self.stats.pause(self.word_index)
+        self.draw_hud()
         self.wait = False
-        self.display_flip()
-        self.lock = False
+        self.exposure.interrupt(self.display_flip())
 
-    def previous_word(self):
+    def previous_word(self, play_sound=True):
         """
 
         :return:
         """
-        self.negative_sound.play()
-        self.lock = True
-        self.cls()
+        if play_sound:
+            self.audio.play("negative", since=self.pressed_at)
+        self.cls(flip=False)
         self.draw_progress()
         if self.word_index and self.wait:
             self.word_index -= 1
         text = self.words[self.word_index]
         position = self.positions[self.word_index]
-        self.write_text_multicolor(text, position)
-        self.count_fails += 1
-        self.forward_datetime = datetime.now()
-        self.wait = True
-        self.duration = (datetime.now() - self.start_time).total_seconds()
-        self.display_flip()
-        self.lock = False
+        self.write_text_multicolor(text, position, flip=False)
+        self.stats.retry(self.word_index)
+        self.draw_hud()
+        self.show_word()
 
     def display_flip(self):
         """
-        Display flip
-        :return:
+        Display flip
+        :return: time of the clock right after the flip
+        """
+        if self.composing:
+            return self.present_frame()
+        if PROFILER.enabled:
+            under = PROFILER.draw(self.screen)
+            self.display_update()
+            self.screen.blit(under, (0, 0))
+        else:
+            self.display_update()
+        return self.clock()
+
+    def display_update(self, rects=None):
+        """
+        Show the screen surface
+        :param rects: parts of the screen that changed, None for all of it
+        :return:
+        """
+        if self.renderer is not None:
+            self.renderer.update(rects)
+        elif rects is None:
+            self.pg.display.flip()
+        else:
+            self.pg.display.update(rects)
+
+    def present_frame(self):
+        """
+        Present the frame composed by the drawing methods with the texture renderer
+        :return: time of the clock right after the present
+        """
+        frame = self.frame
+        name = "background_gray" if frame["gray"] else "background"
+        layers = [
+            ((name, self.screen.get_size()), self.assets.variant(name, self.screen.get_size()), self.background_rect)
+        ]
+        if frame["key"] is not None:
+            surface = frame["surface"]
+            layers.append((frame["key"], surface, surface.get_rect(center=self.screen.get_rect().center)))
+        if frame["hud"] is not None:
+            layers.append((None, *frame["hud"]))
+        if PROFILER.enabled:
+            layers.append((None, PROFILER.render(), (0, 0)))
+        fills = []
+        if frame["progress"] is not None:
+            fraction, color = frame["progress"]
+            fills.append((pg.Rect(0, self.height_usable - 25, self.width * fraction, 20), PROGRESS_COLORS[color]))
+        self.renderer.present(layers, fills)
+        return self.clock()
+
+    def get_words(self, language="pt", kind="frequent", clipboard_=False, locale=None, rnd=None):
+        """
+        Get words, the word lists are read from their compiled corpus in a shuffled order
+        :param language:
+        :param kind:
+        :param clipboard_:
+        :param locale:
+        :param rnd: random.Random instance of the shuffle, None for the global one
+        :return:
+        """
+
+        if clipboard_:
+            return list(tokenize(self.get_text(language=language, kind=kind, clipboard_=clipboard_)))
+
+        if not locale:
+            locale = next(item["locale"] for item in WORDS_MAPPING[language] if item["kind"] == kind)
+        try:
+            corpus = load_corpus(language, kind, locale)
+        except (OSError, ValueError, struct.error) as e:
+            # word list missing or unreadable, or compiled corpus corrupt
+            print(e)
+            self.back_to_menu("Erro ao carregar palavras")
+        return CorpusWords(corpus, corpus.permutation(rnd))
+
+    def select_words(self, locale, selection, rnd=None):
+        """
+        Draw the words of a selection from the word index of the locale
+        :param locale:
+        :param selection: filters, like "syllables=2,contains=lh"
+        :param rnd: random.Random instance, None for the global one
+        :return: CorpusWords
         """
-        self.pg.display.flip()
+        try:
+            index = load_word_index(locale)
+        except (OSError, ValueError, struct.error) as e:
+            print(e)
+            self.back_to_menu("Erro ao carregar palavras")
+        words = CorpusWords(index.corpus, index.select(rnd=rnd, **parse_selection(selection)))
+        if not words:
+            self.back_to_menu("Sem palavras")
+        return words
 
-    def get_words(self, language="pt", kind="frequent", clipboard_=False):
+    def get_text(self, language="pt", kind="frequent", clipboard_=False):
         """
-        Get words
+        Get the text of the words
         :param language:
         :param kind:
         :param clipboard_:
@@ -283,36 +3059,113 @@ class Ledora:
         """
 
         text = None
+        message = "Erro ao carregar palavras"
         if clipboard_:
             try:
-                text = pyperclip.paste()
+                text = self.read_clipboard()
+            except ClipboardTimeout as e:
+                print(e)
+                message = "A área de transferência não respondeu"
             except:
                 print("No clipboard")
 
         if kind and not text:
             file = f"{language}_{kind}.txt"
-            with open(resource_path("txts", file), encoding="utf-8") as f:
-                text = f.read()
+            try:
+                text = read_resource("txts", file).decode("utf-8")
+            except (OSError, ValueError) as e:
+                print(e)
 
         if not text:
-            self.cls()
+            self.back_to_menu(message)
+
+        return text
+
+    def back_to_menu(self, message):
+        """
+        Show why the session cannot start and go back to the initial screen
+        :param message:
+        :return:
+        """
+        self.cls()
+        self.write_title()
+        self.write_message(message)
+        self.display_flip()
+        sleep(2)
+        raise SceneChange("initial")
+
+    def read_clipboard(self):
+        """
+        Read the clipboard without freezing the window, showing a progress message if it takes long
+        :return: text
+        """
+        request = self.clipboard.paste_async()
+        deadline = perf_counter() + 2 * self.clipboard.timeout
+        scheduler = FrameScheduler(frame_rate=10)
+        frame = 0
+        while not request.done.wait(0.1):
+            if perf_counter() > deadline:
+                raise ClipboardTimeout(f"Clipboard did not answer in {2 * self.clipboard.timeout} s")
+            for event in scheduler.wait(perf_counter()):
+                if event.type == pg.QUIT:
+                    raise SceneChange(None)
+            frame += 1
+            self.cls(flip=False)
             self.write_title()
-            self.write_message("Erro ao carregar palavras")
+            self.write_message("Lendo a área de transferência" + "." * (frame % 4))
             self.display_flip()
-            sleep(2)
-            self.screen_initial()
+        if request.error is not None:
+            raise request.error
+        return request.text
 
-        text = (text.
-                replace("\n", " ").
-                replace("\r", " ")
-                )
-        text = re.sub(" +", " ", text)
+    def stream_words(self, text, locale, shuffle_=False):
+        """
+        Start syllabifying the words of the text in the background, the total is unknown until the end
+        :param text:
+        :param locale:
+        :param shuffle_:
+        :return:
+        """
+        self.stop_words()
+        self.words, self.positions, self.n = [], [], None
+        self.stream = WordStream(text, locale, shuffle_=shuffle_)
 
-        words = text.split(" ")
-        if not clipboard_:
-            shuffle(words)
+    def fill_words(self, block=False):
+        """
+        Move the batches of the word stream to the words, keeping a batch ahead of the current word
+        :param block: wait for a batch if none is ready
+        :return:
+        """
+        while self.stream is not None and len(self.words) - self.word_index <= WORD_BATCH_SIZE:
+            batch = self.stream.fetch(block)
+            if batch is False:
+                return
+            if batch is None:
+                self.stream = None
+                self.n = len(self.words)
+                return
+            words, positions = batch
+            self.words.extend(words)
+            self.positions.extend(positions)
+            block = False
 
-        return words
+    def stop_words(self):
+        """
+        Stop the word stream, if any
+        :return:
+        """
+        if self.stream is not None:
+            self.stream.cancel()
+            self.stream = None
+
+    @property
+    def last_word(self):
+        """
+        Check if the current word is the last one
+        :return:
+        """
+        self.fill_words()
+        return self.stream is None and self.word_index + 1 >= len(self.words)
 
     @staticmethod
     def analyse_words(words, locale="pt_PT"):
@@ -322,8 +3175,9 @@ class Ledora:
         :param locale:
         :return:
         """
-        pp = pyphen.Pyphen(lang=locale, left=1, right=1)
-        return [Ledora.get_positions(pp, word) for word in words]
+        if isinstance(words, CorpusWords):
+            return words.positions
+        return get_syllable_cache(locale).positions(words)
 
     @staticmethod
     def get_positions_(pp, word):
@@ -351,53 +3205,129 @@ class Ledora:
         :return:
         """
         if not font:
-            font = pg.font.Font(None, 180)
+            font = FONTS.get(180, name=None)
         font_size = font.size(text)
         ren = font.render(text, 0, FONT_COLOR)
-        if dest is not None:
+        if self.composing:
+            self.frame.update(key=("text", text, font.get_height()), surface=ren)
+        elif dest is not None:
             self.screen.blit(ren, dest)
         else:
             rect = ren.get_rect(center=(self.width / 2, self.height / 2))
             self.screen.blit(ren, rect)
         return font_size
 
-    def write_text_multicolor(self, text, positions, font=None):
+    def get_word_font(self):
+        """
+        Returns the font of the words
+        :return:
+        """
+        return FONTS.get_freetype(int(100 * self.width / 1920))
+
+    @staticmethod
+    def render_text_multicolor(text, positions, font, colors=WORD_COLORS, mode=WORD_RENDERING):
+        """
+        Render text with multiple colors according to the positions
+        :param text:
+        :param positions:
+        :param font:
+        :param colors:
+        :param mode: letters renders each letter, atlas blits the cached glyphs, runs renders each syllable;
+            the letters are placed by their advance in every mode, so the surfaces are the same
+        :return: surface with the text
+        """
+        if mode == "letters":
+            text_surf_rect = font.get_rect(" " + text + " ")
+            size, baseline = text_surf_rect.size, text_surf_rect.y
+            advances = [metric[4] for metric in font.get_metrics(text)]
+        else:
+            # measured from the cached metrics of the letters instead of laying out the text
+            size, baseline, advances = GLYPHS.layout(font, text)
+        text_surf = pg.Surface(size, pg.SRCALPHA)
+
+        bounds = [0, *positions, len(text)]
+        x = -2
+        if mode == "letters":
+            start_index = 0
+            letter_colors = []
+            for i, end_index in enumerate(list(positions) + [len(text)]):
+                for j in range(start_index, end_index):
+                    letter_colors.append(colors[i % 2])
+                    start_index += 1
+
+            # render each letter of the current sentence one by one
+            for color, letter, advance in zip(letter_colors, text, advances):
+                font.render_to(text_surf, (x, baseline), letter, color)
+                # and move the start position
+                x += advance
+        elif mode == "atlas":
+            for i, (start, end) in enumerate(zip(bounds, bounds[1:])):
+                for letter in text[start:end]:
+                    left, top, _, advance = GLYPHS.metric(font, letter)
+                    text_surf.blit(GLYPHS.glyph(font, letter, colors[i % 2]), (x + left, baseline - top))
+                    x += advance
+        elif mode == "runs":
+            for i, (start, end) in enumerate(zip(bounds, bounds[1:])):
+                if start < end:
+                    font.render_to(text_surf, (x, baseline), text[start:end], colors[i % 2])
+                    x += sum(advances[start:end])
+        else:
+            raise ValueError(f"Unknown word rendering {mode}")
+
+        return text_surf
+
+    def word_surface_key(self, text, positions, font):
+        return text, tuple(positions), font.size, WORD_COLORS
+
+    def write_text_multicolor(self, text, positions, font=None, flip=True):
         """
-        Write text with multiple colors according to the positions
+        Write text with multiple colors according to the positions, reusing the rendered surface when cached
         :param text:
         :param positions:
         :param font:
+        :param flip:
         :return:
         """
         if not font:
-            font = pygame.freetype.Font(
-                resource_path(ASSETS_PATH, "fonts", "OpenDyslexic-Regular.otf"), int(100 * self.width / 1920)
-            )
-            font.origin = True
-
-        text_surf_rect = font.get_rect(" " + text + " ")
-        baseline = text_surf_rect.y
-        text_surf = pg.Surface(text_surf_rect.size, pg.SRCALPHA)
-        text_surf_rect.center = self.screen.get_rect().center
-        metrics = font.get_metrics(text)
+            font = self.get_word_font()
 
-        start_index = 0
-        possible_colors = ["lightgrey", "steelblue3"]
-        colors = []
-        for i, end_index in enumerate(positions + [len(text)]):
-            for j in range(start_index, end_index):
-                colors.append(possible_colors[i % 2])
-                start_index += 1
+        key, text_surf = self.word_surface(text, positions, font)
+        if self.composing:
+            self.frame.update(key=key, surface=text_surf, word=True)
+        else:
+            self.screen.blit(text_surf, text_surf.get_rect(center=self.screen.get_rect().center))
+        if flip:
+            self.display_flip()
 
-        x = -2
-        # render each letter of the current sentence one by one
-        for color, letter, metric in zip(colors, text, metrics):
-            font.render_to(text_surf, (x, baseline), letter, color)
-            # and move the start position
-            x += metric[4]
+    def word_surface(self, text, positions, font):
+        """
+        Returns the rendered word from the cache, rendering it if missing
+        :param text:
+        :param positions:
+        :param font:
+        :return: cache key and surface
+        """
+        key = self.word_surface_key(text, positions, font)
+        text_surf = self.word_cache.get(key)
+        if text_surf is None:
+            text_surf = self.render_text_multicolor(text, positions, font, mode=self.word_rendering)
+            self.word_cache.put(key, text_surf)
+        return key, text_surf
 
-        self.screen.blit(text_surf, text_surf_rect)
-        self.display_flip()
+    def prefetch_words(self, lookahead=WORD_LOOKAHEAD):
+        """
+        Render the next words ahead of time so that showing them is just a blit
+        :param lookahead: number of words after the current one
+        :return:
+        """
+        font = self.get_word_font()
+        for index in range(self.word_index + 1, min(self.word_index + 1 + lookahead, len(self.words))):
+            text, positions = self.words[index], self.positions[index]
+            key = self.word_surface_key(text, positions, font)
+            if key not in self.word_cache:
+                self.word_cache.put(key, self.render_text_multicolor(text, positions, font, mode=self.word_rendering))
+            if self.renderer is not None and key not in self.renderer.textures:
+                self.renderer.texture(key, self.word_cache.data[key])
 
     def write_title(self):
         """
@@ -427,7 +3357,7 @@ class Ledora:
 
     def write_countdown(self, n=3):
         self.cls()
-        self.countdown_sound.play()
+        self.audio.play("countdown")
         for i in range(n, 0, -1):
             self.cls()
             self.write_simple_text(str(i), font=get_font(200))
@@ -441,14 +3371,78 @@ class Ledora:
         Draw the progress
         :return:
         """
+        progress = self.progress()
+        if self.composing:
+            self.frame["progress"] = progress
+        elif progress is not None:
+            fraction, color = progress
+            rect = pg.Rect(0, self.height_usable - 25, self.width * fraction, 20)
+            self.pg.draw.rect(self.screen, PROGRESS_COLORS[color], rect)
+
+    def progress(self):
+        """
+        Returns the progress of the session
+        :return: fraction of the words shown and index of its color in PROGRESS_COLORS, None without words
+        """
         if self.n:
-            rect = pg.Rect(0, self.height_usable - 25, self.width * (self.word_index + 1) / self.n, 20)
-            self.pg.draw.rect(self.screen, FONT_COLOR_A, rect)
+            return (self.word_index + 1) / self.n, 0
+        if self.words:
+            # the total is still unknown: progress over the words loaded so far, in a lighter color
+            return (self.word_index + 1) / len(self.words), 1
+        return None
+
+    def draw_hud(self):
+        """
+        Draw the live statistics of the session above the progress, if the HUD is on
+        :return:
+        """
+        if not self.hud:
+            return
+        stats = self.stats
+        pace_wrd, pace_syl = stats.paces(self.clock())
+        text = (
+            f"{stats.words} palavras  {stats.syllables} sílabas  {pace_wrd} palavras/min  {pace_syl} sílabas/min  "
+            f"{stats.fails} retornos"
+        )
+        surface = get_font(12).render(text, True, WORD_COLORS[0])
+        rect = surface.get_rect(midbottom=(self.width / 2, self.height_usable - 35))
+        if self.composing:
+            self.frame["hud"] = surface, rect
+        else:
+            self.screen.blit(surface, rect)
+
+    def draw_pace_curve(self, rect):
+        """
+        Draw the words per minute at each word of the session, with the median and 95th percentile of the
+        reading times below it
+        :param rect: area of the curve
+        :return:
+        """
+        curve = self.stats.pace_curve()
+        if len(curve) < 2:
+            return
+        # the first words of a session give the spikes of the curve
+        top = summarize(curve)["p95"] or 1
+        step = rect.width / (len(curve) - 1)
+        points = [
+            (rect.left + i * step, rect.bottom - min(pace, top) / top * rect.height) for i, pace in enumerate(curve)
+        ]
+        pg.draw.line(self.screen, FONT_COLOR_A, rect.bottomleft, rect.bottomright)
+        pg.draw.lines(self.screen, WORD_COLORS[0], False, points, 2)
+        reading = summarize(self.stats.reading_times(self.clock()))
+        labels = (
+            (f"{int(top)} palavras/min", "bottomleft", rect.move(0, -10).topleft),
+            (f"leitura p50 {reading['p50']:.1f} s", "midtop", rect.move(0, 10).midbottom),
+            (f"p95 {reading['p95']:.1f} s", "midtop", rect.move(0, 30).midbottom),
+        )
+        for text, anchor, pos in labels:
+            label = get_font(12).render(text, True, FONT_COLOR_B)
+            self.screen.blit(label, label.get_rect(**{anchor: pos}))
 
     def btn_menu(self, pos_x, pos_y, text, background_image=None):
         if background_image:
             return Button(
-                image=pg.image.load(asset_item_path("imgs", BUTTON_IMG)),
+                image=self.assets.image(BUTTON_IMG),
                 pos=(pos_x, pos_y),
                 text_input=text,
                 font=get_font(35),
@@ -465,177 +3459,571 @@ class Ledora:
                 hovering_color=FONT_COLOR_B,
             )
 
-    def screen_initial(self):
+    def run(self, scene="initial", **kwargs):
+        """
+        Main loop: each scene returns the next one as a (scene, kwargs) tuple, or None to quit
+        :param scene: initial, instructions, play, results or history
+        :param kwargs: arguments of the scene
+        :return:
+        """
+        scenes = {
+            "initial": self.screen_initial,
+            "instructions": self.screen_instructions,
+            "play": self.screen_play,
+            "results": self.screen_results,
+            "history": self.screen_history,
+        }
+        next_scene = scene, kwargs
+        try:
+            while next_scene is not None:
+                scene, kwargs = next_scene
+                try:
+                    next_scene = scenes[scene](**kwargs)
+                except SceneChange as change:
+                    next_scene = None if change.scene is None else (change.scene, change.kwargs)
+                self.leave_scene(scene, next_scene)
+        finally:
+            self.close()
 
-        self.cls()
-        self.write_title()
+    def close(self):
+        """
+        Release what outlives the scenes, at the end of every mode of the game
+        :return:
+        """
+        self.telemetry.close()
+
+    def leave_scene(self, scene, next_scene):
+        """
+        Free the resources of a scene: the words of the session are kept only from play to results
+        :param scene:
+        :param next_scene:
+        :return:
+        """
+        if scene == "play" and next_scene is not None and next_scene[0] == "results":
+            return
+        if scene in ("play", "results"):
+            self.stop_words()
+            self.initialize_words()
+            self.word_cache.clear()
+            if self.renderer is not None:
+                self.renderer.textures.clear()
 
+    def menu_buttons(self):
+        """
+        Buttons of the initial screen
+        :return: buttons of the word lists by text, history, clipboard, info and quit buttons
+        """
         btns = {}
         for i, (group, items) in enumerate(WORDS_MAPPING.items()):
-            pos_y = 250 + i * 50
+            pos_y = 220 + i * 50
             nj = len(items)
             for j, item in enumerate(items):
                 text = item["text_input"]
                 pos_x = self.width / 2 - 50 * nj + j * 150
                 btn = self.btn_menu(pos_x, pos_y, text)
                 btns[text] = btn
+        for j, item in enumerate(WORD_SELECTIONS):
+            pos_x = self.width / 2 + (j - (len(WORD_SELECTIONS) - 1) / 2) * 150
+            btns[item["text_input"]] = self.btn_menu(pos_x, 220 + len(WORDS_MAPPING) * 50, item["text_input"])
 
-        clipboard_btn = self.btn_menu(self.width / 2, self.height_usable - 180, "Ctrl+v")
+        clipboard_btn = self.btn_menu(self.width / 2 - 170, self.height_usable - 180, "Ctrl+v")
+        history_btn = self.btn_menu(self.width / 2 + 170, self.height_usable - 180, "Histórico")
         info_btn = self.btn_menu(self.width / 2, self.height_usable - 120, "?")
         quit_btn = self.btn_menu(self.width / 2, self.height_usable - 60, "Sair")
+        return btns, history_btn, clipboard_btn, info_btn, quit_btn
+
+    def screen_initial(self):
+
+        self.cls(flip=False)
+        self.write_title()
+
+        btns, history_btn, clipboard_btn, info_btn, quit_btn = self.menu_buttons()
+        buttons = ButtonGroup(
+            [*btns.values(), history_btn, clipboard_btn, quit_btn, info_btn], self.background, self.background_rect
+        )
+        buttons.draw(self.screen, pg.mouse.get_pos())
+        self.display_flip()
+        self.mark_startup("first menu frame")
 
-        self.main_sound.play()
+        self.audio.play_music("main")
+        self.warm_up()
+        if self.profiler is not None:
+            self.audio.ready.wait()
+            self.mark_startup("deferred loading")
+            self.profiler.report()
+            return None
 
+        scheduler = FrameScheduler()
         while True:
 
+            events = scheduler.wait()
             MENU_MOUSE_POS = pg.mouse.get_pos()
+            self.display_update(buttons.update(self.screen, MENU_MOUSE_POS))
 
-            for btn in btns.values():
-                btn.changeColor(MENU_MOUSE_POS)
-                btn.update(self.screen)
-            clipboard_btn.changeColor(MENU_MOUSE_POS)
-            clipboard_btn.update(self.screen)
-            quit_btn.changeColor(MENU_MOUSE_POS)
-            quit_btn.update(self.screen)
-            info_btn.changeColor(MENU_MOUSE_POS)
-            info_btn.update(self.screen)
-
-            for event in pg.event.get():
+            for event in events:
                 if event.type == pg.QUIT:
-                    pg.quit()
-                    sys.exit()
+                    return None
                 if event.type == pg.MOUSEBUTTONDOWN:
+                    MENU_MOUSE_POS = event.pos
 
+                    if quit_btn.checkForInput(MENU_MOUSE_POS):
+                        return None
+                    elif info_btn.checkForInput(MENU_MOUSE_POS):
+                        self.audio.stop_music()
+                        return "instructions", {}
+                    elif history_btn.checkForInput(MENU_MOUSE_POS):
+                        self.audio.stop_music()
+                        return "history", {}
                     for value in WORDS_MAPPING.values():
-                        if quit_btn.checkForInput(MENU_MOUSE_POS):
-                            pg.quit()
-                            sys.exit()
-                        elif info_btn.checkForInput(MENU_MOUSE_POS):
-                            self.main_sound.stop()
-                            self.screen_instructions()
-                        else:
-                            for item in value:
-                                btn = btns[item["text_input"]]
-                                if btn.checkForInput(MENU_MOUSE_POS):
-                                    self.main_sound.stop()
-                                    self.screen_play(
-                                        language=item["language"], locale=item["locale"], kind=item["kind"]
-                                    )
-                            if clipboard_btn.checkForInput(MENU_MOUSE_POS):
-                                self.main_sound.stop()
-                                self.screen_play(language=None, locale="pt_PT", kind=None, clipboard_=True)
-
-            pg.display.update()
+                        for item in value:
+                            btn = btns[item["text_input"]]
+                            if btn.checkForInput(MENU_MOUSE_POS):
+                                self.audio.stop_music()
+                                return "play", dict(language=item["language"], locale=item["locale"], kind=item["kind"])
+                    for item in WORD_SELECTIONS:
+                        if btns[item["text_input"]].checkForInput(MENU_MOUSE_POS):
+                            self.audio.stop_music()
+                            return "play", dict(
+                                language=item["language"], locale=item["locale"], selection=item["selection"]
+                            )
+                    if clipboard_btn.checkForInput(MENU_MOUSE_POS):
+                        self.audio.stop_music()
+                        return "play", dict(language=None, locale="pt_PT", kind=None, clipboard_=True)
+
+    def results(self):
+        """
+        Metrics of the session shown by the results screen
+        :return: dict
+        """
+        stats = self.stats
+        pace_wrd, pace_syl = stats.paces(self.clock())
+
+        # the stars are given for the words read, also when the session ended before the last word
+        n = stats.words
+        s = 5
+        if stats.fails > 0:
+            s -= 1
+
+        if stats.fails > n * 0.3:
+            s -= 1
+
+        if self.duration > n * 1:
+            s -= 1
+
+        if self.duration > n * 2:
+            s -= 1
+
+        return {
+            "words": stats.words,
+            "seconds": int(self.duration),
+            "syllables": stats.syllables,
+            "syllables_per_minute": pace_syl,
+            "words_per_minute": pace_wrd,
+            "fails": stats.fails,
+            "stars": s,
+        }
 
     def screen_results(self):
 
-        self.results_sound.play(loops=True)
+        self.audio.play_music("results", loops=1)
         back_btn = self.btn_menu(self.width / 2, self.height_usable - 120, "Voltar")
 
-        kpi = 0
-        for i in range(0, self.word_index + 1):
-            kpi += len(self.positions[i]) + 1
+        results = self.results()
 
-        pace_syl = int(kpi / (datetime.now() - self.start_time).total_seconds() * 60)
-        pace_wrd = int((self.word_index + 1) / (datetime.now() - self.start_time).total_seconds() * 60)
-
-        self.cls()
+        self.cls(flip=False)
         self.write_title()
         self.draw_progress()
-        options_text = get_font(32).render(f"{self.word_index+1} palavras", True, FONT_COLOR_B)
+        options_text = get_font(32).render(f"{results['words']} palavras", True, FONT_COLOR_B)
         rect = options_text.get_rect(center=(self.width / 2, 260))
         self.screen.blit(options_text, rect)
-        options_text = get_font(32).render(f"{int(self.duration)} segundos", True, FONT_COLOR_B)
+        options_text = get_font(32).render(f"{results['seconds']} segundos", True, FONT_COLOR_B)
         rect = options_text.get_rect(center=(self.width / 2, 310))
         self.screen.blit(options_text, rect)
-        options_text = get_font(32).render(f"{kpi} sílabas", True, FONT_COLOR_B)
+        options_text = get_font(32).render(f"{results['syllables']} sílabas", True, FONT_COLOR_B)
         rect = options_text.get_rect(center=(self.width / 2, 360))
         self.screen.blit(options_text, rect)
-        options_text = get_font(32).render(f"{pace_syl} sílabas/minuto", True, FONT_COLOR_B)
+        options_text = get_font(32).render(f"{results['syllables_per_minute']} sílabas/minuto", True, FONT_COLOR_B)
         rect = options_text.get_rect(center=(self.width / 2, 410))
         self.screen.blit(options_text, rect)
-        options_text = get_font(32).render(f"{pace_wrd} palavras/minuto", True, FONT_COLOR_B)
+        options_text = get_font(32).render(f"{results['words_per_minute']} palavras/minuto", True, FONT_COLOR_B)
         rect = options_text.get_rect(center=(self.width / 2, 460))
         self.screen.blit(options_text, rect)
-        options_text = get_font(32).render(f"{self.count_fails} retornos", True, FONT_COLOR_B)
+        options_text = get_font(32).render(f"{results['fails']} retornos", True, FONT_COLOR_B)
         rect = options_text.get_rect(center=(self.width / 2, 510))
         self.screen.blit(options_text, rect)
 
-        s = 5
-        if self.count_fails > 0:
-            s -= 1
-
-        if self.count_fails > self.n * 0.3:
-            s -= 1
-
-        if self.duration > self.n * 1:
-            s -= 1
-
-        if self.duration > self.n * 2:
-            s -= 1
+        self.draw_pace_curve(pg.Rect(self.width / 2 + 200, 260, 220, 120))
 
+        s = results["stars"]
         for i in range(5):
-            star = pg.transform.scale(pg.image.load(resource_path("assets", "imgs", STAR_IMG)), (30, 30))
-            if i + 1 > s:
-                star = pg.transform.grayscale(star)
+            star = self.assets.variant("star_gray" if i + 1 > s else "star", self.screen.get_size())
             self.screen.blit(star, ((i + 1) * 60 + self.width / 2 - 5 * 60 / 2, self.height_usable - 75))
 
+        buttons = ButtonGroup([back_btn], self.background, self.background_rect)
+        buttons.draw(self.screen, pg.mouse.get_pos())
         self.display_flip()
 
+        scheduler = FrameScheduler()
         while True:
+            events = scheduler.wait()
             MENU_MOUSE_POS = pg.mouse.get_pos()
-            back_btn.changeColor(MENU_MOUSE_POS)
-            back_btn.update(self.screen)
-            events = pg.event.get()
+            self.display_update(buttons.update(self.screen, MENU_MOUSE_POS))
             for event in events:
                 if event.type == pg.KEYDOWN:
                     if event.key == pg.K_ESCAPE:
-                        self.results_sound.stop()
-                        self.screen_initial()
+                        self.audio.stop_music()
+                        return "initial", {}
                 elif event.type == pg.QUIT:
-                    self.pg.quit()
-                    sys.exit()
+                    self.audio.stop_music()
+                    return None
                 elif back_btn.checkForInput(MENU_MOUSE_POS):
-                    self.results_sound.stop()
-                    self.screen_initial()
+                    self.audio.stop_music()
+                    return "initial", {}
 
-    def screen_play(self, language, locale=None, kind=None, clipboard_=False):
+    def screen_play(self, language, locale=None, kind=None, clipboard_=False, selection=None):
 
-        if not locale:
-            locale = language
-        self.lock = True
-        self.words = self.get_words(language=language, kind=kind, clipboard_=clipboard_)
-        self.positions = self.analyse_words(self.words, locale=locale)
-        self.n = len(self.words)
+        try:
+            if not locale:
+                locale = language
+            self.warm_up()
+            self.load_session(language, locale, kind, clipboard_, selection=selection)
+            # the messages of the loading are drawn on the screen, the countdown and the words are composed
+            self.composing = self.compose_frames
+            self.cls(flip=False)
+            self.write_title()
+            self.write_countdown()
+            self.start_time = self.clock()
+            self.stats.start(self.start_time)
+            self.started_on = datetime.now()
+            self.wait = True
+
+            scheduler = FrameScheduler()
+            while True:
+                events = scheduler.wait(self.exposure.deadline if self.wait else None)
+                if self.wait and not self.check_word_still_shown:
+                    self.hide_word()
+                for event in events:
+                    if event.type == pg.KEYDOWN:
+                        self.pressed_at = self.clock()
+                        if self.session_log is not None:
+                            self.session_log.key(self.pressed_at - self.start_time, event.key)
+                        next_scene = self.press_key(event.key)
+                        if next_scene is not None:
+                            self.report_session(scheduler)
+                            self.save_session_log()
+                            self.save_telemetry(
+                                language, locale, kind or selection, finished=next_scene[0] == "results"
+                            )
+                            return next_scene
+                    elif event.type == pg.QUIT:
+                        self.save_session_log()
+                        return None
+                self.fill_words()
+                self.prefetch_words()
+        finally:
+            self.composing = False
+
+    def load_session(self, language, locale, kind, clipboard_=False, seed=None, text=None, selection=None):
+        """
+        Load the words of a play session and start recording it, if recording
+        :param language:
+        :param locale:
+        :param kind:
+        :param clipboard_:
+        :param seed: seed of the shuffle of the word list, random by default
+        :param text: text of a replayed clipboard session, syllabified at once instead of streamed
+        :param selection: filters of the words drawn from the word index of the locale, see parse_selection
+        :return:
+        """
+        if seed is None:
+            seed = getrandbits(32)
+        loading_start = perf_counter()
+        if text is not None:
+            self.stop_words()
+            self.words = list(tokenize(text))
+            self.positions = self.analyse_words(self.words, locale=locale)
+            self.n = len(self.words)
+        elif clipboard_:
+            text = self.get_text(language=language, kind=kind, clipboard_=clipboard_)
+            self.stream_words(text, locale)
+        elif selection is not None:
+            self.stop_words()
+            self.words = self.select_words(locale, selection, rnd=Random(seed))
+            self.positions = self.words.positions
+            self.n = len(self.words)
+        else:
+            self.stop_words()
+            self.words = self.get_words(language=language, kind=kind, locale=locale, rnd=Random(seed))
+            self.positions = self.analyse_words(self.words, locale=locale)
+            self.n = len(self.words)
 
         self.set_states()
-        self.write_title()
-        self.write_countdown()
-        self.start_time = datetime.now()
-        self.lock = False
-        self.wait = True
+        # the latencies are measured per session, those of a session not reported would pile up
+        self.audio.latencies.clear()
+        self.fill_words(block=True)
+        self.first_words_time = perf_counter() - loading_start
+        self.prefetch_words()
 
-        while True:
-            events = pg.event.get()
-            if self.lock:
-                continue
-            if self.wait and not self.check_word_still_shown:
-                self.hide_word()
-            for event in events:
-                if event.type == pg.KEYDOWN:
-                    if event.key == pg.K_ESCAPE:
-                        self.screen_initial()
-                    elif self.word_index + 1 >= self.n or event.key in (pg.K_END, pg.K_q, pg.K_RETURN):
-                        self.screen_results()
-                    elif event.key in (pg.K_RIGHT,):
-                        self.next_word()
-                    elif event.key in (pg.K_LEFT,):
-                        self.previous_word()
-                    elif event.key in (pg.K_SPACE,):
-                        self.pause_word()
-                elif event.type == pg.QUIT:
-                    self.pg.quit()
-                    sys.exit()
+        self.session_log = None
+        if self.record_dir is not None:
+            # the clipboard text is kept as is, a word list is checked against the hash of its shuffled words
+            self.session_log = SessionLog(
+                language,
+                locale,
+                kind,
+                clipboard_,
+                seed=seed,
+                text=text,
+                words_hash=None if text is not None else SessionLog.hash_words(self.words),
+                selection=selection,
+            )
+
+    def save_session_log(self):
+        """
+        Save the record of the play session, if recording
+        :return:
+        """
+        if self.session_log is not None:
+            file = path.join(self.record_dir, f"session-{strftime('%Y%m%d-%H%M%S')}.json")
+            self.session_log.save(file)
+            self.session_log = None
+            print(f"Session recorded in {file}")
+
+    def save_telemetry(self, language, locale, kind, finished=True):
+        """
+        Queue the session and its words for the history of the child
+        :param language:
+        :param locale:
+        :param kind:
+        :param finished: False if the session was cancelled
+        :return:
+        """
+        results = self.results()
+        stats = self.stats
+        syllables = stats.syllables_before
+        # time on screen measured by the exposure timer, summed over the returns to the word; the word left
+        # on screen is measured until the end of the session
+        self.exposure.interrupt(stats.elapsed(self.clock()) + stats.started_at)
+        shown = [0.0] * len(stats.shown_at)
+        for word_index, _, shown_at, hidden_at in self.exposure.exposures:
+            if word_index < len(shown):
+                shown[word_index] += hidden_at - shown_at
+        words = list(
+            zip(
+                self.words,
+                map(int.__sub__, syllables[1:], syllables),
+                shown,
+                stats.retries,
+                stats.word_pauses,
+            )
+        )
+        session = {
+            "child": self.child,
+            "started": self.started_on.timestamp(),
+            "language": language,
+            "kind": kind,
+            "locale": locale,
+            "finished": finished,
+            "words": results["words"],
+            "syllables": results["syllables"],
+            # the time of the paces of the results
+            "seconds": stats.elapsed(self.clock()),
+            "fails": results["fails"],
+            "pauses": stats.pauses,
+            "stars": results["stars"],
+        }
+        self.telemetry.record(session, words)
+
+    def press_key(self, key):
+        """
+        Handle a key of the play session, pressed or replayed
+        :param key: pygame key code
+        :return: next scene if the key ends the session, None otherwise
+        """
+        if key == pg.K_ESCAPE:
+            self.stop_words()
+            self.stats.end(self.pressed_at)
+            return "initial", {}
+        elif key == pg.K_h:
+            self.hud = not self.hud
+        elif self.last_word or key in (pg.K_END, pg.K_q, pg.K_RETURN):
+            self.stop_words()
+            self.stats.end(self.pressed_at)
+            return "results", {}
+        elif key in (pg.K_RIGHT, pg.K_LEFT):
+            hits = self.word_cache.hits
+            if key == pg.K_RIGHT:
+                if not self.next_word():
+                    # the end of the stream came after the check of the last word
+                    self.stats.end(self.pressed_at)
+                    return "results", {}
+            else:
+                self.previous_word()
+            cached = self.word_cache.hits > hits
+            self.key_latencies[cached].append(self.exposure.shown_at - self.pressed_at)
+        elif key in (pg.K_SPACE,):
+            self.pause_word()
+        return None
+
+    def replay(self, log):
+        """
+        Replay a recorded session through the same key handling as the live one, as fast as possible:
+        the clock is virtual and jumps from each key event or word hide to the next
+        :param log: SessionLog
+        :return: dict with the real time spent per frame, the scene the session ended on and its results
+        """
+        clock = self.clock = VirtualClock()
+        self.composing = self.compose_frames
+        self.cls(flip=False)
+        try:
+            self.warm_up()
+            self.audio.ready.wait()
+            self.load_session(
+                log.language,
+                log.locale,
+                log.kind,
+                log.clipboard_,
+                seed=log.seed,
+                text=log.text,
+                selection=log.selection,
+            )
+            if log.words_hash is not None and SessionLog.hash_words(self.words) != log.words_hash:
+                raise ValueError("The words differ from the recorded session, the word list has changed")
+            self.start_time = clock()
+            self.stats.start(self.start_time)
+            self.wait = True
+
+            frame_times = []
+            next_scene = None
+            for at, key in log.keys():
+                at += self.start_time
+                # a word due to be hidden before the key is hidden on its deadline, as in the live loop
+                if self.wait and self.exposure.deadline is not None and self.exposure.deadline <= at:
+                    clock.now = self.exposure.deadline
+                if self.wait and not self.check_word_still_shown:
+                    frame_start = perf_counter()
+                    self.hide_word()
+                    frame_times.append(perf_counter() - frame_start)
+
+                clock.now = self.pressed_at = at
+                frame_start = perf_counter()
+                next_scene = self.press_key(key)
+                if next_scene is None:
+                    self.fill_words()
+                    self.prefetch_words()
+                frame_times.append(perf_counter() - frame_start)
+                if next_scene is not None:
+                    break
+
+            self.stop_words()
+            return {
+                "scene": next_scene[0] if next_scene is not None else None,
+                "frame_times": summarize(frame_times),
+                "results": self.results(),
+            }
+        finally:
+            self.clock = perf_counter
+            self.composing = False
+
+    def soak(self, cycles, interval=SOAK_INTERVAL, thresholds=SOAK_THRESHOLDS):
+        """
+        Drive synthetic menu, play and results cycles through the scenes, as a kiosk does all day, and measure how
+        the process grows: the menu gets a click on a word list, the play a replayed session and the results ESC.
+        The sessions are saved in a temporary history.
+        :param cycles:
+        :param interval: cycles between samples
+        :param thresholds: maximum growth per cycle, see SoakMonitor.report
+        :return: drift report
+        """
+        items = [item for items in WORDS_MAPPING.values() for item in items]
+        rnd = Random(0)
+        monitor = SoakMonitor()
+        telemetry = self.telemetry
+        self.warm_up()
+        self.audio.ready.wait()
+        import tempfile
+
+        with tempfile.TemporaryDirectory(prefix="ledora-soak-") as directory:
+            self.telemetry = TelemetryStore(path.join(directory, "telemetry.sqlite3"))
+            monitor.start()
+            try:
+                for cycle in range(cycles + 1):
+                    if cycle % interval == 0:
+                        monitor.sample(cycle)
+                    if cycle == cycles:
+                        break
+
+                    item = items[cycle % len(items)]
+                    button = self.menu_buttons()[0][item["text_input"]]
+                    pg.event.post(pg.event.Event(pg.MOUSEBUTTONDOWN, pos=button.rect.center, button=1))
+                    scene, kwargs = self.screen_initial()
+                    self.leave_scene("initial", (scene, kwargs))
+
+                    log = SessionLog(kwargs["language"], kwargs["locale"], kwargs["kind"], seed=rnd.getrandbits(32))
+                    at = 0.3
+                    for i in range(SOAK_WORDS):
+                        log.key(at, pg.K_RIGHT)
+                        at += rnd.uniform(0.3, 1.5)
+                        if rnd.random() < 0.1:
+                            log.key(at, rnd.choice((pg.K_LEFT, pg.K_SPACE)))
+                            at += rnd.uniform(0.3, 1.5)
+                    log.key(at, pg.K_RETURN)
+                    self.started_on = datetime.now()
+                    self.replay(log)
+                    self.save_telemetry(kwargs["language"], kwargs["locale"], kwargs["kind"])
+                    self.leave_scene("play", ("results", {}))
+
+                    pg.event.post(pg.event.Event(pg.KEYDOWN, key=pg.K_ESCAPE))
+                    next_scene = self.screen_results()
+                    self.leave_scene("results", next_scene)
+            finally:
+                monitor.stop()
+                self.telemetry.close()
+                self.telemetry = telemetry
+        return monitor.report(thresholds)
+
+    def report_session(self, scheduler):
+        """
+        Print the CPU usage and the word exposure accuracy of the play session
+        :param scheduler:
+        :return:
+        """
+        report = scheduler.report()
+        print(f"Words: {len(self.words)} loaded, first words ready in {self.first_words_time * 1000:.1f} ms")
+        print(
+            f"Session: {report['cpu_time']:.2f} s CPU in {report['wall_time']:.2f} s "
+            f"({report['cpu_usage']:.1%}), {report['frames']} frames"
+        )
+        stats = self.exposure.stats()
+        print(
+            f"Exposures: {stats['count']} words, error {stats['mean_error'] * 1000:+.1f} ms "
+            f"(sd {stats['stdev_error'] * 1000:.1f} ms, min {stats['min_error'] * 1000:+.1f} ms, "
+            f"max {stats['max_error'] * 1000:+.1f} ms)"
+        )
+        reading = summarize(self.stats.reading_times(self.clock()))
+        print(
+            f"Reading: {reading['count']} words, p50 {reading['p50']:.2f} s, p95 {reading['p95']:.2f} s, "
+            f"max {reading['max']:.2f} s"
+        )
+        latency = summarize(self.key_latencies[True] + self.key_latencies[False])
+        cached = summarize(self.key_latencies[True])
+        uncached = summarize(self.key_latencies[False])
+        print(
+            f"Key to flip: {latency['count']} presses, mean {latency['mean'] * 1000:.1f} ms, "
+            f"p95 {latency['p95'] * 1000:.1f} ms (cached {cached['count']} x {cached['mean'] * 1000:.1f} ms, "
+            f"rendered {uncached['count']} x {uncached['mean'] * 1000:.1f} ms)"
+        )
+        audio = summarize(self.audio.latencies)
+        print(
+            f"Key to sound: {audio['count']} effects, mean {audio['mean'] * 1000:.2f} ms, "
+            f"max {audio['max'] * 1000:.2f} ms (mixer buffer {self.audio.buffer} samples)"
+        )
+        self.audio.latencies.clear()
+        fonts = FONTS.stats()
+        print(
+            f"Fonts: {fonts['hits']} hits, {fonts['misses']} misses, {fonts['disk_reads']} disk reads, "
+            f"{fonts['cached']} cached"
+        )
 
     def screen_instructions(self):
         """
@@ -651,26 +4039,348 @@ class Ledora:
         self.write_text("ESPAÇO para pausar", self.width // 2, 400, font_size=25)
         self.write_text("ESC para cancelar", self.width // 2, 450, font_size=25)
         self.write_text("ENTER (ou Q ou END) para finalizar", self.width // 2, 500, font_size=25)
+        self.write_text("H para mostrar as estatísticas", self.width // 2, 550, font_size=25)
         self.display_flip()
 
-        waiting_for_key = True
-        while waiting_for_key:
-            for event in pg.event.get():
+        scheduler = FrameScheduler()
+        while True:
+            for event in scheduler.wait():
                 if event.type == pg.QUIT:
-                    pg.quit()
-                    sys.exit()
+                    return None
                 elif event.type == pg.KEYDOWN:
-                    self.screen_initial()
-                    waiting_for_key = False
-                    break
+                    return "initial", {}
+
+    def screen_history(self):
+        """
+        Screen with the history of the child: totals, monthly pace and the words with the most returns
+        :return:
+        """
+        back_btn = self.btn_menu(self.width / 2, self.height_usable - 120, "Voltar")
+
+        # the sessions of this run may still be queued
+        self.telemetry.close()
+        started = perf_counter()
+        history = self.telemetry.history(self.child)
+        print(f"History: {history['totals']['sessions']} sessions in {(perf_counter() - started) * 1000:.1f} ms")
+
+        self.cls(flip=False)
+        self.write_title()
+        totals = history["totals"]
+        self.write_text(f"Histórico {self.child}".strip(), self.width // 2, 190, font_size=35)
+        self.write_text(
+            f"{totals['sessions']} sessões, {totals['words']} palavras, {totals['fails']} retornos",
+            self.width // 2,
+            240,
+            font_size=20,
+        )
+        self.write_text(
+            f"{totals['words_per_minute']} palavras/minuto, {totals['syllables_per_minute']} sílabas/minuto",
+            self.width // 2,
+            275,
+            font_size=20,
+        )
+        y = 330
+        for month, month_totals in history["months"]:
+            self.write_text(
+                f"{month}: {month_totals['words_per_minute']} palavras/minuto, "
+                f"{month_totals['syllables_per_minute']} sílabas/minuto",
+                self.width // 2,
+                y,
+                font_size=20,
+            )
+            y += 30
+        if history["hardest"]:
+            hardest = ", ".join(word for word, _ in history["hardest"])
+            self.write_text(f"Mais retornos: {hardest}", self.width // 2, y + 20, font_size=20)
+
+        buttons = ButtonGroup([back_btn], self.background, self.background_rect)
+        buttons.draw(self.screen, pg.mouse.get_pos())
+        self.display_flip()
+
+        scheduler = FrameScheduler()
+        while True:
+            events = scheduler.wait()
+            MENU_MOUSE_POS = pg.mouse.get_pos()
+            self.display_update(buttons.update(self.screen, MENU_MOUSE_POS))
+            for event in events:
+                if event.type == pg.KEYDOWN:
+                    if event.key == pg.K_ESCAPE:
+                        return "initial", {}
+                elif event.type == pg.QUIT:
+                    return None
+                elif event.type == pg.MOUSEBUTTONDOWN and back_btn.checkForInput(MENU_MOUSE_POS):
+                    return "initial", {}
 
     def __del__(self):
         self.pg.quit()
 
 
+PROFILER.watch(Ledora, "cls", "write_text_multicolor", "draw_progress", "display_flip", "analyse_words")
+
+
+class OperatorLedora(Ledora):
+    """
+    Operator console of a split session: the words are presented to the child by a display process on another
+    screen, while this window shows the operator the current and next words with their syllables and the live
+    statistics. The frames composed during play are those of the child screen.
+    """
+
+    def __init__(self, *args, display=None, headless=False, **kwargs):
+        self.remote = RemoteDisplay(display, headless)
+        self.key_pending = False
+        super().__init__(*args, **kwargs)
+        self.compose_frames = True
+
+    def get_word_font(self):
+        return FONTS.get_freetype(int(100 * self.remote.width / 1920))
+
+    def set_states(self):
+        super().set_states()
+        self.remote.latencies.clear()
+        self.remote.exposures.clear()
+
+    def present_frame(self):
+        """
+        Send the frame of the child screen to the display process, then redraw the console
+        :return: time of the clock right after sending the frame
+        """
+        frame = self.frame
+        fraction, color = frame["progress"] or (-1.0, 0)
+        self.remote.frame(
+            frame["key"],
+            frame["surface"],
+            frame["gray"],
+            fraction,
+            color,
+            # a replayed key has a virtual time
+            since=self.pressed_at if self.key_pending and self.clock is perf_counter else nan,
+            timed=frame["word"] and not frame["gray"],
+        )
+        sent_at = self.clock()
+        self.key_pending = False
+        self.remote.poll()
+        self.composing = False
+        try:
+            self.draw_console()
+            self.display_flip()
+        finally:
+            self.composing = True
+        return sent_at
+
+    def prefetch_words(self, lookahead=WORD_LOOKAHEAD):
+        super().prefetch_words(lookahead)
+        font = self.get_word_font()
+        for index in range(self.word_index + 1, min(self.word_index + 1 + lookahead, len(self.words))):
+            key = self.word_surface_key(self.words[index], self.positions[index], font)
+            surface = self.word_cache.data.get(key)
+            if surface is not None:
+                self.remote.preload(key, surface)
+
+    def draw_console(self):
+        """
+        Draw what the child sees, the syllables of the current and next words and the live statistics
+        :return:
+        """
+        frame = self.frame
+        self.cls(gray=frame["gray"], flip=False)
+        self.write_title()
+        if 0 <= self.word_index < len(self.words):
+            state = "pausa" if frame["gray"] else "visível" if frame["word"] else "oculta"
+            self.write_text(
+                hyphenate(self.words[self.word_index], self.positions[self.word_index]), self.width / 2, 220
+            )
+            self.write_text(f"{self.word_index + 1} / {self.n or len(self.words)} - {state}", self.width / 2, 280, 20)
+        upcoming = range(self.word_index + 1, min(self.word_index + 1 + WORD_LOOKAHEAD, len(self.words)))
+        for i, index in enumerate(upcoming):
+            self.write_text(hyphenate(self.words[index], self.positions[index]), self.width / 2, 360 + i * 50, 25)
+
+        stats = self.stats
+        pace_wrd, pace_syl = stats.paces(self.clock())
+        latency = summarize(self.remote.latencies[-PROFILE_WINDOW:])
+        self.write_text(
+            f"{stats.words} palavras  {stats.syllables} sílabas  {stats.fails} retornos  {stats.pauses} pausas",
+            self.width / 2,
+            560,
+            16,
+        )
+        self.write_text(
+            f"{pace_wrd} palavras/min  {pace_syl} sílabas/min  latência p95 {latency['p95'] * 1000:.1f} ms",
+            self.width / 2,
+            600,
+            16,
+        )
+        self.draw_progress()
+
+    def press_key(self, key):
+        # the next frame sent is the one changed by the key
+        self.key_pending = True
+        try:
+            return super().press_key(key)
+        finally:
+            self.key_pending = False
+
+    def screen_play(self, language, locale=None, kind=None, clipboard_=False, selection=None):
+        try:
+            return super().screen_play(language, locale, kind, clipboard_, selection)
+        finally:
+            self.remote.frame()
+
+    def report_session(self, scheduler):
+        super().report_session(scheduler)
+        while self.remote.sent and self.remote.conn.poll(1):
+            self.remote.poll()
+        latency = summarize(self.remote.latencies)
+        exposures = summarize(self.remote.exposures)
+        print(
+            f"Key to child flip: {latency['count']} frames, mean {latency['mean'] * 1000:.1f} ms, "
+            f"p95 {latency['p95'] * 1000:.1f} ms (budget {DISPLAY_LATENCY_BUDGET * 1000:.1f} ms)"
+        )
+        print(
+            f"Child exposures: {exposures['count']} words, mean {exposures['mean'] * 1000:.1f} ms, "
+            f"p50 {exposures['p50'] * 1000:.1f} ms, max {exposures['max'] * 1000:.1f} ms"
+        )
+        self.remote.latencies.clear()
+        self.remote.exposures.clear()
+
+    def close(self):
+        super().close()
+        self.remote.close()
+
+
 def main():
-    ldr = Ledora()
-    ldr.screen_initial()
+    if getattr(sys, "frozen", False):
+        # the processes of --compile-corpus and --operator start the frozen executable again
+        from multiprocessing import freeze_support
+
+        freeze_support()
+    parser = argparse.ArgumentParser(prog=APP_NAME.lower(), description=f"{APP_NAME} v{APP_VERSION}")
+    parser.add_argument(
+        "--compile-corpus",
+        nargs="*",
+        metavar="FILE",
+        help="compile the word lists of the game, or these files, report the changed syllable splits and exit",
+    )
+    parser.add_argument("--locale", help="locale of the files of --compile-corpus, or of --select (pt_PT by default)")
+    parser.add_argument(
+        "--select",
+        metavar="FILTERS",
+        help="start a session of words drawn from the index of the locale, like syllables=2,contains=lh,count=20",
+    )
+    parser.add_argument("--workers", type=int, help="processes of --compile-corpus, one per CPU by default")
+    parser.add_argument(
+        "--pack-assets",
+        nargs="?",
+        const="",
+        metavar="FILE",
+        help=f"pack the assets and the compiled word lists in one file ({ASSET_PACK} by default) and exit",
+    )
+    parser.add_argument(
+        "--startup-profile", action="store_true", help="print the timing of the startup phases and exit"
+    )
+    parser.add_argument("--profile", action="store_true", help="start with the profiling overlay (F3 toggles it)")
+    parser.add_argument("--record", metavar="DIR", help="record the play sessions in this directory")
+    parser.add_argument("--replay", metavar="FILE", help="replay a recorded session, print its timings and exit")
+    parser.add_argument("--headless", action="store_true", help="no window nor sound, for --replay and --soak")
+    parser.add_argument(
+        "--soak",
+        type=int,
+        metavar="CYCLES",
+        help="run synthetic menu, play and results cycles, print the growth of the memory, surfaces, fonts "
+        "and open files and fail if above the thresholds",
+    )
+    parser.add_argument(
+        "--operator", action="store_true", help="present the words to the child on another screen, driven from this one"
+    )
+    parser.add_argument("--display", type=int, help="screen of the child with --operator, the last one by default")
+    parser.add_argument(
+        "--child", default=environ.get("LEDORA_CHILD", ""), help="name of the child, for the history of the sessions"
+    )
+    args = parser.parse_args()
+
+    if args.headless:
+        environ["SDL_VIDEODRIVER"] = "dummy"
+        environ["SDL_AUDIODRIVER"] = "dummy"
+
+    if args.compile_corpus is not None:
+        jobs = []
+        for file in args.compile_corpus:
+            locale = args.locale or word_list_locale(file)
+            if locale is None:
+                parser.error(f"--locale is needed for {file}")
+            jobs.append((file, path.splitext(file)[0] + ".ldc", locale))
+        if not jobs:
+            for items in WORDS_MAPPING.values():
+                for item in items:
+                    name = f"{item['language']}_{item['kind']}"
+                    jobs.append(
+                        (resource_path("txts", f"{name}.txt"), resource_path("txts", f"{name}.ldc"), item["locale"])
+                    )
+
+        started = perf_counter()
+        for report in build_corpora(jobs, workers=args.workers):
+            print(
+                f"{report['target']}: {report['words']} words, {len(report['added'])} added, "
+                f"{len(report['removed'])} removed, {len(report['changed'])} splits changed"
+            )
+            for word, previous, positions in report["changed"]:
+                print(f"  {hyphenate(word, previous)} -> {hyphenate(word, positions)}")
+        if not args.compile_corpus:
+            for locale in dict.fromkeys(item["locale"] for items in WORDS_MAPPING.values() for item in items):
+                file = build_word_index(locale)
+                print(f"{file}: {len(WordIndex.open(file))} words indexed")
+        print(f"Compiled in {perf_counter() - started:.2f} s")
+        if args.pack_assets is None:
+            return
+
+    if args.pack_assets is not None:
+        file = build_asset_pack(args.pack_assets or None)
+        pack = AssetPack.open(file)
+        print(f"{file}: {len(pack)} files, {len(pack.buffer) / 1024:.0f} KiB")
+        return
+
+    profiler = None
+    if args.startup_profile:
+        profiler = StartupProfiler()
+        profiler.mark("imports")
+
+    if args.operator:
+        ldr = OperatorLedora(
+            profiler=profiler, record_dir=args.record, child=args.child, display=args.display, headless=args.headless
+        )
+    else:
+        ldr = Ledora(profiler=profiler, record_dir=args.record, child=args.child)
+    if args.profile:
+        PROFILER.enable()
+    # the display process of --operator is stopped whatever the mode
+    try:
+        if args.replay:
+            print(json.dumps(ldr.replay(SessionLog.load(args.replay)), indent=2))
+            return
+        if args.select is not None:
+            locale = args.locale or "pt_PT"
+            try:
+                parse_selection(args.select)
+                language = locale_corpora(locale)[0][0]
+            except (ValueError, IndexError):
+                parser.error(f"--select {args.select} is not a selection of the words of {locale}")
+            ldr.run("play", language=language, locale=locale, selection=args.select)
+            return
+        if args.soak is not None:
+            report = ldr.soak(args.soak)
+            for sample in report["samples"]:
+                print(
+                    f"cycle {sample['cycle']:>6}: heap {sample['heap'] / 1024:10.1f} KiB, {sample['objects']} objects, "
+                    f"{sample['surfaces']} surfaces, {sample['fonts']} fonts, {sample['files']} files"
+                )
+            for metric, growth in report["growth"].items():
+                print(f"{metric:<10} {growth:+12.3f} per cycle (threshold {SOAK_THRESHOLDS[metric]})")
+            if report["failed"]:
+                print(f"Drift above the thresholds: {', '.join(report['failed'])}")
+                sys.exit(1)
+            return
+        ldr.run()
+    finally:
+        ldr.close()
 
 
 if __name__ == "__main__":
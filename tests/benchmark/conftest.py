@@ -0,0 +1,94 @@
+import json
+import os
+from statistics import median
+from time import perf_counter
+
+import pytest
+
+# headless: the SDL dummy drivers must be selected before pygame is initialized
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+BASELINES = os.environ.get("LEDORA_BENCHMARK_BASELINES", os.path.join(os.path.dirname(__file__), "baselines.json"))
+THRESHOLD = float(os.environ.get("LEDORA_BENCHMARK_THRESHOLD", "1.5"))
+# seconds per call below which a difference is noise of the machine, not a regression
+FLOOR = float(os.environ.get("LEDORA_BENCHMARK_FLOOR", "0.0001"))
+# the calls of a round are batched until the round lasts this long
+ROUND_TIME = 0.02
+UPDATE = os.environ.get("LEDORA_BENCHMARK_UPDATE") == "1"
+
+
+class Bench:
+    """
+    Times a function (median of the rounds, seconds per call) and compares it with the saved baseline
+    """
+
+    def __init__(self, baselines):
+        self.baselines = baselines
+        self.results = {}
+
+    def __call__(self, name, func, number=None, repeat=7):
+        start = perf_counter()
+        func()
+        if number is None:
+            number = max(1, int(ROUND_TIME / max(perf_counter() - start, 1e-6)))
+        rounds = []
+        for _ in range(repeat):
+            start = perf_counter()
+            for _ in range(number):
+                func()
+            rounds.append((perf_counter() - start) / number)
+        result = self.results[name] = median(rounds)
+
+        baseline = self.baselines.get(name)
+        if baseline is not None and not UPDATE:
+            assert result <= baseline * THRESHOLD + FLOOR, (
+                f"{name} regressed: {result * 1000:.3f} ms per call, "
+                f"baseline {baseline * 1000:.3f} ms (threshold x{THRESHOLD} + {FLOOR * 1000:.2f} ms)"
+            )
+        return result
+
+
+@pytest.fixture(scope="session")
+def bench():
+    try:
+        with open(BASELINES, encoding="utf-8") as f:
+            baselines = json.load(f)
+    except (OSError, ValueError):
+        baselines = {}
+
+    bench = Bench(baselines)
+    yield bench
+
+    # new benchmarks get a baseline, existing ones are only replaced with LEDORA_BENCHMARK_UPDATE=1
+    updated = {**bench.results, **baselines} if not UPDATE else {**baselines, **bench.results}
+    with open(BASELINES, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(updated.items())), f, indent=2)
+    for name, result in sorted(bench.results.items()):
+        print(f"{name:<40} {result * 1000:10.3f} ms")
+
+
+@pytest.fixture(scope="session")
+def ldr():
+    from ledora import Ledora
+
+    ldr = Ledora()
+    ldr.warm_up()
+    ldr.audio.ready.wait()
+    return ldr
+
+
+@pytest.fixture(scope="session")
+def texture_ldr():
+    from ledora import Ledora
+
+    # the SDL software renderer with the dummy video driver
+    os.environ["LEDORA_RENDERER"] = "texture"
+    try:
+        ldr = Ledora()
+    finally:
+        del os.environ["LEDORA_RENDERER"]
+    assert ldr.renderer is not None
+    ldr.warm_up()
+    ldr.audio.ready.wait()
+    return ldr
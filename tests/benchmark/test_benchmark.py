@@ -0,0 +1,260 @@
+import glob
+import os
+import subprocess
+import sys
+from random import Random
+
+import pytest
+
+import pygame as pg
+
+from ledora import Ledora, ButtonGroup, SessionLog, SyllableCache, TelemetryStore, WordIndex, WORDS_MAPPING
+from ledora import ASSET_PACK_DIRS, build_asset_pack, compile_word_index, get_pyphen, resource_path, tokenize
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get("LEDORA_BENCHMARK") != "1", reason="benchmarks run with LEDORA_BENCHMARK=1"
+)
+
+WORD = "pneumonoultramicroscopicsilicovolcanoconiosis"
+POSITIONS = [3, 5, 7, 10, 12, 15, 17, 19, 21, 24, 26, 28, 31, 34, 36, 39, 41, 43]
+
+
+def word_lists():
+    locales = {item["language"]: item["locale"] for items in WORDS_MAPPING.values() for item in items}
+    for file in sorted(glob.glob(resource_path("txts", "*.txt"))):
+        language = os.path.basename(file).split("_")[0]
+        with open(file, encoding="utf-8") as f:
+            yield os.path.basename(file), locales[language], list(tokenize(f.read()))
+
+
+@pytest.fixture
+def session(ldr):
+    ldr.set_states()
+    ldr.words = ldr.get_words(language="pt", kind="frequent", locale="pt_PT")[:20]
+    ldr.positions = Ledora.analyse_words(ldr.words, locale="pt_PT")
+    ldr.n = len(ldr.words)
+    ldr.start_time = 0
+    yield ldr
+    ldr.initialize_words()
+
+
+class TestRendering:
+
+    def test_render_text_multicolor(self, bench, ldr):
+
+        font = ldr.get_word_font()
+        for mode in ("letters", "atlas", "runs"):
+            bench(
+                f"render_text_multicolor ({mode})",
+                lambda: Ledora.render_text_multicolor(WORD, POSITIONS, font, mode=mode),
+            )
+
+    def test_write_text_multicolor(self, bench, ldr):
+
+        bench("write_text_multicolor (cached)", lambda: ldr.write_text_multicolor(WORD, POSITIONS, flip=False))
+
+    def test_cls(self, bench, ldr):
+
+        bench("cls", lambda: ldr.cls())
+        bench("cls(gray=True)", lambda: ldr.cls(gray=True))
+
+    def test_word_frames(self, bench, ldr, texture_ldr):
+
+        for backend, renderer in (("surface", ldr), ("texture", texture_ldr)):
+
+            def word_frame():
+                renderer.composing = renderer.compose_frames
+                renderer.cls(flip=False)
+                renderer.write_text_multicolor(WORD, POSITIONS, flip=False)
+                renderer.draw_progress()
+                renderer.display_flip()
+                renderer.cls()
+                renderer.composing = False
+
+            renderer.words, renderer.n, renderer.word_index = [WORD] * 20, 20, 9
+            bench(f"word and blank frames ({backend})", word_frame)
+            renderer.initialize_words()
+
+    def test_menu_frames(self, bench, ldr, texture_ldr):
+        for backend, renderer in (("surface", ldr), ("texture", texture_ldr)):
+            self.menu_frames(bench, renderer, "" if backend == "surface" else f" ({backend})")
+
+    def menu_frames(self, bench, ldr, suffix):
+
+        def draw_menu():
+            ldr.cls(flip=False)
+            ldr.write_title()
+            btns, history_btn, clipboard_btn, info_btn, quit_btn = ldr.menu_buttons()
+            buttons = ButtonGroup(
+                [*btns.values(), history_btn, clipboard_btn, info_btn, quit_btn], ldr.background, ldr.background_rect
+            )
+            buttons.draw(ldr.screen, (0, 0))
+            ldr.display_flip()
+            return buttons, clipboard_btn
+
+        buttons, clipboard_btn = draw_menu()
+        positions = [(0, 0), clipboard_btn.rect.center]
+
+        def hover_frame():
+            positions.reverse()
+            ldr.display_update(buttons.update(ldr.screen, positions[0]))
+
+        bench(f"screen_initial first frame{suffix}", draw_menu)
+        bench(f"screen_initial hover frame{suffix}", hover_frame)
+
+
+class TestPlay:
+
+    def test_next_word(self, bench, session):
+
+        def next_word():
+            if session.word_index + 1 >= session.n:
+                session.word_index = -1
+            session.next_word(play_sound=False)
+
+        bench("next_word", next_word)
+
+    def test_previous_word(self, bench, session):
+
+        session.next_word(play_sound=False)
+        session.next_word(play_sound=False)
+
+        def previous_word():
+            session.wait = False
+            session.previous_word(play_sound=False)
+
+        bench("previous_word", previous_word)
+
+    def test_get_words(self, bench, ldr):
+
+        bench("get_words (compiled corpus)", lambda: ldr.get_words(language="pt", kind="hard", locale="pt_PT"))
+
+    def test_replay(self, bench, ldr):
+
+        # a recorded session of 100 words with some returns and pauses, replayed at full speed
+        log = SessionLog("pt", "pt_PT", "frequent", seed=1)
+        at = 0.3
+        for i in range(100):
+            log.key(at, pg.K_RIGHT)
+            at += 0.4 if i % 3 else 1.2
+            if i % 7 == 0:
+                log.key(at, pg.K_LEFT)
+                at += 0.8
+            if i % 11 == 0:
+                log.key(at, pg.K_SPACE)
+                at += 2
+        log.key(at, pg.K_RETURN)
+
+        assert ldr.replay(log)["results"] == ldr.replay(log)["results"]
+        bench("replay (100 words)", lambda: ldr.replay(log))
+        ldr.initialize_words()
+
+
+class TestSelection:
+
+    def test_select(self, bench, tmp_path):
+
+        # 200k words: those of the word lists and made-up ones of 2 to 6 syllables
+        rnd = Random(1)
+        syllables = ["ba", "lha", "ca", "de", "nho", "fi", "go", "chu", "ma", "pe", "rro", "ti", "su", "vo"]
+        words = dict.fromkeys(word for _, _, words in word_lists() for word in words)
+        while len(words) < 200000:
+            words["".join(rnd.choice(syllables) for _ in range(rnd.randint(2, 6)))] = None
+        words = list(words)
+        positions = Ledora.analyse_words(words[:1000], locale="pt_PT")
+        positions += [[]] * (len(words) - len(positions))
+        file = tmp_path / "pt_PT.ldi"
+        file.write_bytes(compile_word_index(words, positions, "pt_PT"))
+
+        bench("open word index (200k words)", lambda: WordIndex.open(str(file)))
+        index = WordIndex.open(str(file))
+        for spec in (dict(contains="lh"), dict(syllables=(2, 2), contains="lh"), dict(length=(4, 6))):
+            selection = ", ".join(f"{key}={value}" for key, value in spec.items())
+            bench(f"select 20 words ({selection})", lambda: index.select(20, rnd=rnd, **spec))
+
+
+class TestSyllables:
+
+    def test_analyse_words(self, bench):
+
+        for name, locale, words in word_lists():
+            cache = SyllableCache(locale)
+            hyph_dict = get_pyphen(locale).hd
+
+            def hyphenate():
+                # both the persistent cache and the one of pyphen start empty
+                cache.words = {}
+                hyph_dict.cache.clear()
+                cache.positions(words, save=False)
+
+            bench(f"analyse_words {name}", hyphenate)
+            bench(f"analyse_words {name} (cached)", lambda: Ledora.analyse_words(words, locale=locale))
+
+
+class TestTelemetry:
+
+    def test_history(self, bench, tmp_path):
+
+        # two years of daily sessions of 40 words, for 4 children
+        store = TelemetryStore(str(tmp_path / "telemetry.sqlite3"))
+        day = 24 * 3600
+        for i in range(4 * 730):
+            session = {
+                "child": f"child {i % 4}",
+                "started": 1.7e9 + i // 4 * day,
+                "language": "pt",
+                "kind": "frequent",
+                "locale": "pt_PT",
+                "finished": True,
+                "words": 40,
+                "syllables": 100,
+                "seconds": 60.0 + i % 30,
+                "fails": i % 5,
+                "pauses": i % 3,
+                "stars": 4,
+            }
+            store.record(session, [(f"word{(i + j) % 500}", 2, 1.2, (i + j) % 3 == 0, 0) for j in range(40)])
+        store.close()
+
+        history = bench("history (730 sessions of 40 words)", lambda: store.history("child 1"))
+        assert history < 0.5
+
+
+class TestSoak:
+
+    def test_no_drift(self, ldr):
+
+        report = ldr.soak(60)
+        assert not report["failed"], report["growth"]
+
+
+class TestStartup:
+
+    def test_cold_start(self, bench, tmp_path):
+
+        pack = build_asset_pack(str(tmp_path / "ledora.ldp"))
+        files = [pack, *(f for d in ASSET_PACK_DIRS for f in glob.glob(resource_path(d, "**", "*"), recursive=True))]
+
+        def evict():
+            # drop the files from the page cache where the OS allows it, as after a reboot
+            if hasattr(os, "posix_fadvise"):
+                for file in filter(os.path.isfile, files):
+                    fd = os.open(file, os.O_RDONLY)
+                    try:
+                        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                    finally:
+                        os.close(fd)
+
+        for mode, assets in (("loose files", "loose"), ("asset pack", pack)):
+            env = {**os.environ, "LEDORA_ASSETS": assets, "SDL_VIDEODRIVER": "dummy", "SDL_AUDIODRIVER": "dummy"}
+
+            def start():
+                evict()
+                subprocess.run(
+                    [sys.executable, resource_path("ledora.py"), "--startup-profile"],
+                    env=env,
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                )
+
+            bench(f"cold start ({mode})", start, number=1, repeat=5)
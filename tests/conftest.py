@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# keep the persistent caches and data of the test session away from the user directories
+os.environ["LEDORA_CACHE_DIR"] = tempfile.mkdtemp(prefix="ledora-tests-")
+os.environ["LEDORA_DATA_DIR"] = tempfile.mkdtemp(prefix="ledora-tests-data-")
@@ -1,5 +1,14 @@
-from ledora import Ledora
+from os import path
+from random import Random
+from time import perf_counter
+
+from ledora import Ledora, Button, ExposureTimer, FontRegistry, SyllableCache, WordStream, FONTS
+from ledora import Corpus, CorpusWords, SectionProfiler, SessionLog, SessionStats, SoakMonitor, TelemetryStore
+from ledora import RemoteDisplay, TextureRenderer, WordIndex, build_corpora, compile_corpus, compile_word_index
+from ledora import AssetPack, compile_asset_pack, parse_selection, summarize, ASSET_PACK_ALIGN, DISPLAY_LATENCY_BUDGET
 import pyphen
+import pytest
+import pygame as pg
 
 
 class TestLedora:
@@ -24,3 +33,408 @@ class TestLedora:
         for expected, word in zip(positions_e, words):
             calculated = Ledora.get_positions(word=word, pp=pp)
             assert calculated == expected
+
+    def test_render_text_multicolor_modes(self):
+
+        pg.init()
+        font = FONTS.get_freetype(60)
+        word, positions = "fjord-Wave", [2, 5, 7]
+
+        letters = Ledora.render_text_multicolor(word, positions, font, mode="letters")
+        for mode in ("atlas", "runs"):
+            surface = Ledora.render_text_multicolor(word, positions, font, mode=mode)
+            assert pg.image.tobytes(surface, "RGBA") == pg.image.tobytes(letters, "RGBA")
+
+
+class TestExposureTimer:
+
+    def test_hide_is_scheduled_on_a_frame_boundary(self):
+
+        timer = ExposureTimer(frame_rate=60, clock=lambda: 10.0)
+        timer.show(word_index=0, target=0.51, shown_at=10.0)
+
+        assert abs(timer.deadline - (10.0 + 31 / 60)) < 1e-9
+        assert abs(timer.time_left - 31 / 60) < 1e-9
+
+    def test_stats(self):
+
+        timer = ExposureTimer(frame_rate=60)
+        timer.show(word_index=0, target=0.5, shown_at=1.0)
+        timer.hide(hidden_at=1.52)
+        timer.show(word_index=1, target=0.5, shown_at=2.0)
+        timer.cancel()
+        timer.show(word_index=2, target=0.5, shown_at=3.0)
+        timer.hide(hidden_at=3.5)
+        timer.show(word_index=3, target=0.5, shown_at=4.0)
+        timer.show(word_index=4, target=0.5, shown_at=4.25)
+        timer.interrupt(4.5)
+
+        stats = timer.stats()
+        assert stats["count"] == 2
+        assert abs(stats["max_error"] - 0.02) < 1e-9
+        assert abs(stats["min_error"]) < 1e-9
+        assert [(index, hidden_at - shown_at) for index, target, shown_at, hidden_at in timer.exposures[2:]] == [
+            (3, 0.25),
+            (4, 0.25),
+        ]
+
+
+class TestSessionStats:
+
+    def test_accumulates_without_a_final_pass(self):
+
+        stats = SessionStats()
+        stats.start(10.0)
+        for index, (syllables, shown_at) in enumerate(((3, 11.0), (2, 12.0), (4, 14.0))):
+            stats.show(index, syllables)
+            stats.flipped(shown_at)
+        stats.retry(1)
+        stats.show(2, 4)
+        stats.flipped(16.0)
+        stats.pause(2)
+        stats.end(22.0)
+
+        assert (stats.words, stats.syllables, stats.fails, stats.pauses) == (3, 9, 1, 1)
+        assert stats.paces(now=100.0) == (15, 45)
+        assert list(stats.reading_times(now=100.0)) == [1.0, 2.0, 8.0]
+        assert list(stats.retries) == [0, 1, 0]
+        assert list(stats.pace_curve()) == [60.0, 60.0, 45.0]
+
+
+class TestFontRegistry:
+
+    def test_faces_are_read_once(self):
+
+        pg.font.init()
+        registry = FontRegistry(maxsize=2)
+
+        assert registry.get(35) is registry.get(35)
+        registry.get(50)
+        registry.get(100)
+        registry.get(35)
+
+        stats = registry.stats()
+        assert stats["disk_reads"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 4
+        assert stats["cached"] == 2
+
+
+class TestButton:
+
+    def test_change_color_only_reports_hovering_changes(self):
+
+        pg.font.init()
+        btn = Button(None, (100, 100), "PT1", FontRegistry().get(35), "steelblue3", "white")
+
+        assert not btn.changeColor((0, 0))
+        assert btn.changeColor((100, 100))
+        assert btn.text is btn.hovering_text
+        assert not btn.changeColor((101, 100))
+        assert btn.changeColor((0, 0))
+        assert btn.text is btn.base_text
+
+
+class TestSyllableCache:
+
+    def test_positions_are_persisted(self, tmp_path, monkeypatch):
+
+        monkeypatch.setenv("LEDORA_CACHE_DIR", str(tmp_path))
+        words = ["acordaram", "olharam"]
+
+        cache = SyllableCache("pt_PT")
+        assert cache.positions(words) == [[1, 4, 6], [1, 4]]
+
+        cache = SyllableCache("pt_PT")
+        assert cache.words == {"acordaram": [1, 4, 6], "olharam": [1, 4]}
+        assert cache.positions(words + ["atentamente"]) == [[1, 4, 6], [1, 4], [1, 4, 6, 9]]
+        assert "atentamente" in SyllableCache("pt_PT").words
+        assert SyllableCache("pt_PT", left=2).words == {}
+
+        assert not cache.dirty
+        cache.positions(["olharam"], save=False)
+        assert not cache.dirty
+        cache.positions(["disse-lhe"], save=False)
+        assert cache.dirty
+
+    def test_new_words_are_journaled(self, tmp_path, monkeypatch):
+
+        monkeypatch.setenv("LEDORA_CACHE_DIR", str(tmp_path))
+        cache = SyllableCache("pt_PT")
+        cache.positions(["acordaram", "olharam"])
+        with open(cache.file, encoding="utf-8") as f:
+            stored = f.read()
+        assert not path.exists(cache.journal)
+
+        cache.positions(["atentamente"])
+        cache.save()
+        with open(cache.file, encoding="utf-8") as f:
+            assert f.read() == stored
+        with open(cache.journal, "a", encoding="utf-8") as f:
+            f.write('{"cut":[1')
+        assert SyllableCache("pt_PT").words == {"acordaram": [1, 4, 6], "olharam": [1, 4], "atentamente": [1, 4, 6, 9]}
+
+        cache.positions(["disse-lhe", "velha"])
+        assert not path.exists(cache.journal)
+        assert len(SyllableCache("pt_PT").words) == 5
+
+
+class TestWordStream:
+
+    def test_batches(self):
+
+        stream = WordStream("acordaram\r\n olharam  atentamente\n", "pt_PT", batch_size=2)
+
+        assert stream.fetch() == (["acordaram", "olharam"], [[1, 4, 6], [1, 4]])
+        assert stream.fetch() == (["atentamente"], [[1, 4, 6, 9]])
+        assert stream.fetch() is None
+
+
+class TestCorpus:
+
+    def test_compiled_corpus(self):
+
+        words = ["olharam", "disse-lhe", "é", "atentamente"]
+        positions = [[1, 4], [3, 6], [], [1, 4, 6, 9]]
+
+        corpus = Corpus(compile_corpus(words, positions, "pt_PT", stamp=(10, 20)))
+
+        assert len(corpus) == 4
+        assert list(corpus) == words
+        assert [corpus.positions(i) for i in range(4)] == positions
+        assert corpus.locale == "pt_PT"
+        assert corpus.stamp == (10, 20)
+
+        shuffled = CorpusWords(corpus, corpus.permutation(Random(1)))
+        assert sorted(shuffled) == sorted(words)
+        assert [positions[words.index(word)] for word in shuffled] == list(shuffled.positions)
+
+
+class TestWordIndex:
+
+    def test_select(self):
+
+        words = ["olharam", "disse-lhe", "é", "atentamente", "filho", "palha", "carro"]
+        positions = [[1, 4], [3, 6], [], [1, 4, 6, 9], [2], [3], [3]]
+
+        index = WordIndex(compile_word_index(words, positions, "pt_PT", stamp=5))
+
+        assert (len(index), index.locale, index.stamp) == (7, "pt_PT", 5)
+        assert sorted(index.corpus[i] for i in index.postings("lh")) == ["disse-lhe", "filho", "olharam", "palha"]
+        assert list(index.postings("xyz")) == []
+
+        selected = index.select(10, syllables=(2, 2), contains="LH", rnd=Random(1))
+        assert sorted(index.corpus[i] for i in selected) == ["filho", "palha"]
+        selected = index.select(3, length=(5, 9), rnd=Random(2))
+        assert len(set(selected)) == 3
+        assert all(5 <= len(index.corpus[i]) <= 9 for i in selected)
+        assert list(index.select(10, syllables=(7, 9))) == []
+
+    def test_parse_selection(self):
+
+        assert parse_selection("syllables=2,contains=lh,count=20") == {
+            "syllables": (2, 2),
+            "contains": "lh",
+            "count": 20,
+        }
+        assert parse_selection("length=4-6") == {"length": (4, 6)}
+        with pytest.raises(ValueError):
+            parse_selection("letters=4")
+
+
+class TestAssetPack:
+
+    def test_members(self, tmp_path):
+
+        words = compile_corpus(["olharam", "é"], [[1, 4], []], "pt_PT")
+        members = [("assets/imgs/star.png", b"\x89PNG"), ("assets/fonts/ç.ttf", b""), ("txts/pt_frequent.ldc", words)]
+        (tmp_path / "ledora.ldp").write_bytes(compile_asset_pack(members))
+
+        pack = AssetPack.open(str(tmp_path / "ledora.ldp"))
+
+        assert list(pack) == [name for name, _ in members]
+        assert bytes(pack.view("assets", "imgs", "star.png")) == b"\x89PNG"
+        assert bytes(pack.view("assets", "fonts", "ç.ttf")) == b""
+        assert all(view.obj is pack.buffer for view in pack.members.values())
+        assert pack.view("txts", "pt_frequent.ldc").nbytes == len(words)
+        assert list(Corpus(pack.view("txts", "pt_frequent.ldc"))) == ["olharam", "é"]
+        assert (len(pack.buffer) - len(words)) % ASSET_PACK_ALIGN == 0
+        with pytest.raises(ValueError):
+            AssetPack(words)
+
+
+class TestBuildCorpora:
+
+    def test_changed_splits_are_reported(self, tmp_path):
+
+        source, target = tmp_path / "words.txt", tmp_path / "words.ldc"
+        source.write_text("olharam acordaram\nolharam\n", encoding="utf-8")
+        target.write_bytes(compile_corpus(["olharam", "é"], [[2], []], "pt_PT"))
+
+        (report,) = build_corpora([(str(source), str(target), "pt_PT")], workers=2, chunk_size=1)
+
+        assert report["words"] == 3
+        assert report["added"] == ["acordaram"]
+        assert report["removed"] == ["é"]
+        assert report["changed"] == [("olharam", [2], [1, 4])]
+        corpus = Corpus.open(str(target))
+        assert list(corpus) == ["olharam", "acordaram", "olharam"]
+        assert [corpus.positions(i) for i in range(3)] == [[1, 4], [1, 4, 6], [1, 4]]
+
+
+class TestSessionLog:
+
+    def test_save_and_load(self, tmp_path):
+
+        pg.init()
+        log = SessionLog("pt", "pt_PT", "frequent", seed=7, words_hash=SessionLog.hash_words(["olharam", "é"]))
+        log.key(0.51234, pg.K_RIGHT)
+        log.key(1.2, pg.K_SPACE)
+        log.save(str(tmp_path / "session.json"))
+
+        loaded = SessionLog.load(str(tmp_path / "session.json"))
+        assert (loaded.language, loaded.locale, loaded.kind, loaded.seed) == ("pt", "pt_PT", "frequent", 7)
+        assert loaded.keys() == [(0.5123, pg.K_RIGHT), (1.2, pg.K_SPACE)]
+        assert loaded.words_hash == SessionLog.hash_words(["olharam", "é"])
+        assert loaded.words_hash != SessionLog.hash_words(["é", "olharam"])
+
+
+class TestTelemetryStore:
+
+    def test_history(self, tmp_path):
+
+        store = TelemetryStore(str(tmp_path / "telemetry.sqlite3"))
+        for started, child, finished in ((1.7e9, "ana", True), (1.7e9 + 60, "ana", False), (1.7e9, "rui", True)):
+            session = dict.fromkeys(TelemetryStore.SESSION_COLUMNS, 0)
+            session.update(child=child, started=started, finished=finished, words=2, syllables=5, seconds=30.0)
+            store.record(session, [("olharam", 3, 1.5, 2, 0), ("é", 1, 0.5, 1, 1)])
+        store.close()
+
+        history = store.history("ana")
+        assert history["totals"]["sessions"] == 1
+        assert history["totals"]["words_per_minute"] == 4
+        assert history["totals"]["syllables_per_minute"] == 10
+        assert len(history["months"]) == 1
+        assert history["hardest"] == [("olharam", 2), ("é", 1)]
+        assert store.history("nobody")["totals"]["sessions"] == 0
+
+
+class TestSectionProfiler:
+
+    def test_sections_are_timed_only_while_enabled(self, tmp_path):
+
+        class Shape:
+            def area(self):
+                return 4
+
+            @staticmethod
+            def sides():
+                return 4
+
+        shape = Shape()
+        profiler = SectionProfiler()
+        profiler.watch(shape, "area")
+        profiler.watch(Shape, "area", "sides")
+        original = Shape.area
+
+        profiler.enable()
+        assert shape.area() == 4
+        assert Shape().area() == 4
+        assert shape.sides() == Shape.sides() == 4
+        profiler.frame(0.003)
+        profiler.frame(0.020)
+        profiler.disable()
+
+        assert "area" not in vars(shape)
+        assert Shape.area is original
+        assert isinstance(vars(Shape)["sides"], staticmethod)
+        shape.area()
+        stats = profiler.stats()
+        assert stats["sections"]["area"]["calls"] == 2
+        assert stats["sections"]["sides"]["calls"] == 2
+        assert stats["histogram"]["<4 ms"] == 1 and stats["histogram"]["<33 ms"] == 1
+        profiler.export(str(tmp_path / "profile.json"))
+
+
+class TestRemoteDisplay:
+
+    def test_key_to_flip_latency_is_within_budget(self):
+
+        remote = RemoteDisplay(headless=True)
+        word = pg.Surface((300, 80), pg.SRCALPHA)
+        word.fill("white")
+        try:
+            for i in range(30):
+                remote.frame("word", word, progress=i / 30, since=perf_counter(), timed=True)
+                remote.poll(timeout=1)
+                remote.frame(since=perf_counter())
+                remote.poll(timeout=1)
+        finally:
+            remote.close()
+
+        # the word is sent once, then shown by its slot
+        assert len(remote.slots) == 1
+        assert len(remote.latencies) == 60 and len(remote.exposures) == 30
+        assert summarize(remote.latencies)["p95"] < DISPLAY_LATENCY_BUDGET
+
+
+class TestTextureRenderer:
+
+    def test_layers_are_uploaded_once(self, monkeypatch):
+
+        monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+        pg.display.init()
+        renderer = TextureRenderer("test", (200, 100))
+        background = pg.Surface((200, 100))
+        background.fill("steelblue3")
+        word = pg.Surface((60, 20), pg.SRCALPHA)
+        word.fill("white")
+        for _ in range(3):
+            renderer.present(
+                [("background", background, (0, 0)), ("word", word, word.get_rect(center=(100, 50)))],
+                [(pg.Rect(0, 80, 100, 10), "lightgrey")],
+            )
+
+        assert renderer.textures.misses == 2 and renderer.textures.hits == 4
+        frame = renderer.renderer.to_surface()
+        assert frame.get_at((100, 50)) == pg.Color("white")
+        assert frame.get_at((10, 10)) == pg.Color("steelblue3")
+        assert frame.get_at((10, 85)) == pg.Color("lightgrey")
+
+        # the screen surface is uploaded where it changed
+        renderer.screen.fill("white")
+        renderer.update([pg.Rect(0, 0, 10, 10)])
+        frame = renderer.renderer.to_surface()
+        assert frame.get_at((5, 5)) == pg.Color("white") and frame.get_at((50, 50)) == pg.Color("black")
+
+
+class TestSoakMonitor:
+
+    def test_growth_after_the_warmup(self):
+
+        monitor = SoakMonitor()
+        for cycle in range(0, 110, 10):
+            # the caches fill during the warm-up, then only the heap grows
+            warm = min(cycle, 20)
+            monitor.samples.append(
+                {
+                    "cycle": cycle,
+                    "heap": 1000 * warm + 3000 * cycle,
+                    "objects": 50 * warm,
+                    "surfaces": 9,
+                    "fonts": 4,
+                    "files": 17,
+                }
+            )
+
+        report = monitor.report(warmup=20)
+        assert report["growth"]["heap"] == 3000
+        assert report["growth"]["objects"] == 0 and report["growth"]["surfaces"] == 0
+        assert report["failed"] == ["heap"]
+
+    def test_live_objects(self):
+
+        surfaces = [pg.Surface((1, 1)), {"cached": pg.Surface((1, 1))}]
+        before = SoakMonitor.live_objects()[0]
+        surfaces[1]["other"] = pg.Surface((1, 1))
+        assert SoakMonitor.live_objects()[0] == before + 1